@@ -34,7 +34,7 @@ class BotController:
         self.telegram_bot = telegram_bot
         self.REQUIRE_IMAGE = True
         self._validate_config()
-        self.hourly_stats = {f"hour_{h}": 0 for h in range(24)}
+        self.hourly_stats = [0] * 24  # Отправленные посты по часу суток
 
         self.publication_mode = config.PUBLICATION_MODE
         self.min_delay = config.MIN_DELAY_BETWEEN_POSTS
@@ -136,7 +136,8 @@ class BotController:
             connector=aiohttp.TCPConnector(
                 force_close=True,
                 enable_cleanup_closed=True,
-                limit=0
+                limit=0,
+                limit_per_host=self.config.HTTP_LIMIT_PER_HOST
             ),
             timeout=aiohttp.ClientTimeout(total=30)
         )
@@ -165,7 +166,7 @@ class BotController:
             return False
             
         # Добавлено: проверка на уже инициализированные задачи
-        if hasattr(self, '_tasks_initialized') and self._tasks_initialized:
+        if getattr(self, '_tasks_initialized', False):
             logger.warning("Tasks already initialized")
             return False
             
@@ -611,13 +612,16 @@ class BotController:
             self.config.PUBLICATION_MODE = mode
             self.config.MIN_DELAY_BETWEEN_POSTS = self.min_delay
             
+            env_updates = {
+                "PUBLICATION_MODE": mode,
+                "MIN_DELAY_BETWEEN_POSTS": str(self.min_delay),
+            }
             if mode == 'schedule':
                 schedule_str = ','.join([t.strftime('%H:%M') for t in self.publication_schedule])
                 self.config.PUBLICATION_SCHEDULE = schedule_str
-                self.config.save_to_env_file("PUBLICATION_SCHEDULE", schedule_str)
+                env_updates["PUBLICATION_SCHEDULE"] = schedule_str
             
-            self.config.save_to_env_file("PUBLICATION_MODE", mode)
-            self.config.save_to_env_file("MIN_DELAY_BETWEEN_POSTS", str(self.min_delay))
+            self.config.save_many_to_env_file(env_updates)
             
             logger.info(f"Настройки публикации обновлены: mode={mode}, delay={self.min_delay}, schedule={[t.strftime('%H:%M') for t in self.publication_schedule]}")
             return True
@@ -949,8 +953,7 @@ class BotController:
         self.last_post_time = time.time()
         
         # Обновление почасовой статистики
-        hour = datetime.now().hour
-        self.hourly_stats[f"hour_{hour}"] = self.hourly_stats.get(f"hour_{hour}", 0) + 1
+        self.hourly_stats[datetime.now().hour] += 1
         logger.debug("📊 Статистика обновлена: +1 пост")
 
     def _should_skip_post(self, post: Dict) -> bool:
@@ -1400,21 +1403,13 @@ class BotController:
             message_text = f"<b>{title}</b>\n\n{description}\n\n<a href='{post.get('link', '')}'>Читать далее</a>"
             logger.debug(f"Cleaned title: {title}")
             logger.debug(f"Cleaned description: {description}")
-            # Отправка поста с изображением или без
-            if image_path and os.path.exists(image_path):
-                success = await self.telegram_bot.send_post(
-                    title=title,
-                    description=description,
-                    link=post.get('link', ''),
-                    image_path=image_path
-                )
-            else:
-                success = await self.telegram_bot.send_post(
-                    title=title,
-                    description=description,
-                    link=post.get('link', ''),
-                    image_path=None
-                )
+            # Отправка поста: при пропавшем изображении send_post сам отправит текст
+            success = await self.telegram_bot.send_post(
+                title=title,
+                description=description,
+                link=post.get('link', ''),
+                image_path=image_path
+            )
                 
             if success:
                 logger.info(f"Post sent successfully: {title[:50]}...")
@@ -1435,8 +1430,7 @@ class BotController:
         self.last_post_time = time.time()
         
         # Обновление почасовой статистики
-        hour = datetime.now().hour
-        self.hourly_stats[f"hour_{hour}"] = self.hourly_stats.get(f"hour_{hour}", 0) + 1
+        self.hourly_stats[datetime.now().hour] += 1
 
     async def _cleanup_loop(self):
         """Регулярная очистка устаревших данных"""
@@ -1503,16 +1497,15 @@ class BotController:
             logger.error(f"Ошибка переключения ленты: {str(e)}")
             return False
             
-    def update_rss_state(self, urls: List[str], active: List[bool]):
-        """Обновляет состояние RSS лент"""
-        self.config.RSS_URLS = urls
-        self.config.RSS_ACTIVE = active
-        self.config.save_to_env_file("RSS_URLS", json.dumps(urls))
-        self.config.save_to_env_file("RSS_ACTIVE", json.dumps(active))
+    def update_rss_state(self, urls: List[str], active: List[bool]) -> List[Dict]:
+        """Обновляет состояние RSS лент и возвращает их актуальный статус"""
+        self.config.save_rss_settings(urls, active)
         
         # Обновляем статусы в парсере
         for i, url in enumerate(urls):
             self.rss_parser.set_feed_status(url, active[i])
+        
+        return self.get_rss_status()
     
     def get_rss_state(self) -> Tuple[List[str], List[bool]]:
         """Возвращает текущее состояние RSS"""
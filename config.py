@@ -2,9 +2,11 @@ import json
 import os
 import logging
 import logging.config
+import math
 import re
 import pytz
 import shutil
+import threading
 from datetime import datetime, time as time_class
 import time
 import traceback
@@ -18,6 +20,21 @@ import colorama
 load_dotenv()
 colorama.init()
 
+# Строковые значения .env, считающиеся истиной
+_TRUE_STRINGS = frozenset({'true', '1', 'yes', 'y', 't', 'on'})
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_env_json(value: Any) -> str:
+    """Сериализует список для .env: orjson, если установлен, иначе stdlib json с тем же форматом"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
 class StructuredFormatter(logging.Formatter):
     """Умный форматтер логов с адаптивным выводом для разных режимов"""
     
@@ -294,8 +311,82 @@ def get_logger(name: str, context: Optional[Dict] = None) -> ContextLoggerAdapte
 # Инициализация логгера для самого config.py
 logger = get_logger('ConfigManager')
 
+class RSSUrlStore(list):
+    """Список RSS-лент с индексом для проверки наличия URL за O(1)"""
+
+    def __init__(self, urls=()):
+        super().__init__(urls)
+        self._index = set(self)
+
+    def __contains__(self, url) -> bool:
+        return url in self._index
+
+    def append(self, url: str) -> None:
+        super().append(url)
+        self._index.add(url)
+
+    def extend(self, urls) -> None:
+        urls = list(urls)
+        super().extend(urls)
+        self._index.update(urls)
+
+    def insert(self, index: int, url: str) -> None:
+        super().insert(index, url)
+        self._index.add(url)
+
+    def pop(self, index: int = -1) -> str:
+        url = super().pop(index)
+        self._reindex(url)
+        return url
+
+    def remove(self, url: str) -> None:
+        super().remove(url)
+        self._reindex(url)
+
+    def clear(self) -> None:
+        super().clear()
+        self._index.clear()
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._index = set(self)
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._index = set(self)
+
+    def __iadd__(self, urls) -> "RSSUrlStore":
+        self.extend(urls)
+        return self
+
+    def __imul__(self, n: int) -> "RSSUrlStore":
+        super().__imul__(n)
+        self._index = set(self)
+        return self
+
+    def _reindex(self, url: str) -> None:
+        # Один и тот же URL может встречаться в списке несколько раз
+        if not super().__contains__(url):
+            self._index.discard(url)
+
+
 class Config:
     """Класс для управления конфигурацией приложения"""
+    _version: int = 0
+    # Запись .env может идти из пула потоков, общий .env.tmp требует взаимного исключения
+    _env_lock = threading.Lock()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        # Любое изменение параметра (UPPER_CASE) инвалидирует производные кэши
+        if name.isupper():
+            object.__setattr__(self, '_version', self._version + 1)
+
+    @property
+    def version(self) -> int:
+        """Счетчик изменений параметров, растет при каждом присваивании и записи в .env"""
+        return self._version
+
     def __init__(self):
         # Инициализация логгера с контекстом
         self.logger = get_logger('Config', {'context_module': 'config'})
@@ -348,7 +439,7 @@ class Config:
             self.RSS_ACTIVE = [True] * len(self.RSS_URLS)
             
             # Автоматическое исправление в .env
-            self.save_to_env_file("RSS_ACTIVE", json.dumps(self.RSS_ACTIVE))
+            self.save_to_env_file("RSS_ACTIVE", dumps_env_json(self.RSS_ACTIVE))
 
         # После инициализации RSS_URLS и RSS_ACTIVE добавьте:
         if len(self.RSS_ACTIVE) != len(self.RSS_URLS):
@@ -397,6 +488,9 @@ class Config:
         # Управление ботом
         self.ENABLE_BOT_CONTROL = self.get_env_var('ENABLE_BOT_CONTROL', default=True, var_type=bool)
         self.STATE_FILE: str = self.get_env_var('STATE_FILE', default='bot_state.json')
+        # Окно склейки серии текстовых сообщений (мс); 0 отключает склейку
+        batch_ms = self.get_env_var('BOT_MSG_BATCH_MS', default=200.0, var_type=float)
+        self.BOT_MSG_BATCH_MS: float = min(max(batch_ms, 0.0), 5000.0) if math.isfinite(batch_ms) else 200.0
         self.PROXY_URL: Optional[str] = self.get_sanitized_proxy()
         self.RSS_REQUEST_DELAY: float = self.get_env_var('RSS_REQUEST_DELAY', default=5.0, var_type=float)
         self.MAX_POSTS_PER_CYCLE: int = self.get_env_var('MAX_POSTS_PER_CYCLE', default=5, var_type=int)
@@ -422,6 +516,9 @@ class Config:
             default=4, 
             var_type=int
         )
+        # Соединений к одному хосту в HTTP-сессии: всплеск лент или запросов к YandexGPT
+        # не открывает неограниченное число сокетов к одному адресу
+        self.HTTP_LIMIT_PER_HOST: int = max(1, self.get_env_var('HTTP_LIMIT_PER_HOST', default=10, var_type=int))
         
         # Создание необходимых директорий
         self.create_directories()
@@ -435,6 +532,14 @@ class Config:
         
         self.logger.info("Configuration loaded successfully", extra={'rss_feeds_count': len(self.RSS_URLS)})
     
+    @property
+    def RSS_URLS(self) -> RSSUrlStore:
+        return self._rss_urls
+
+    @RSS_URLS.setter
+    def RSS_URLS(self, urls: List[str]) -> None:
+        self._rss_urls = urls if isinstance(urls, RSSUrlStore) else RSSUrlStore(urls)
+
     def to_dict(self) -> Dict[str, Any]:
         """Возвращает конфигурацию в виде словаря (без секретов)"""
         return {
@@ -465,7 +570,8 @@ class Config:
             'IMAGE_DOWNLOAD_TIMEOUT': self.IMAGE_DOWNLOAD_TIMEOUT,
             'MIN_IMAGE_WIDTH': self.MIN_IMAGE_WIDTH,
             'MIN_IMAGE_HEIGHT': self.MIN_IMAGE_HEIGHT,
-            'MAX_CONCURRENT_IMAGE_TASKS': self.MAX_CONCURRENT_IMAGE_TASKS
+            'MAX_CONCURRENT_IMAGE_TASKS': self.MAX_CONCURRENT_IMAGE_TASKS,
+            'HTTP_LIMIT_PER_HOST': self.HTTP_LIMIT_PER_HOST
         }
 
     #Из-за того что в случае чота не работает видимо посты будут в 9 12 и 18 часов а нужно чтобы заставляли выбрать время, инаеч не прикольно
@@ -536,37 +642,58 @@ class Config:
 
     def save_to_env_file(self, param: str, value: str) -> None:
         """Сохраняет параметр в .env файл с созданием резервной копии"""
+        self.save_many_to_env_file({param: value})
+
+    def save_many_to_env_file(self, updates: Dict[str, str]) -> None:
+        """Сохраняет несколько параметров в .env за одну перезапись файла.
+        Запись идет во временный файл с последующим os.replace, чтобы .env не остался недописанным.
+        Безопасно вызывать из рабочих потоков (asyncio.to_thread): записи сериализуются блокировкой."""
+        with self._env_lock:
+            self._write_env_file(updates)
+
+    def _write_env_file(self, updates: Dict[str, str]) -> None:
         env_file = '.env'
         if not os.path.exists(env_file):
             self.logger.warning(".env file not found, skipping save")
             return
         
+        # Списки (RSS_URLS/RSS_ACTIVE) могли измениться на месте без присваивания
+        self._version += 1
+        
         try:
-            # Создаем резервную копию
-            backup_file = '.env.bak'
-            shutil.copyfile(env_file, backup_file)
-            
             # Читаем файл с правильной кодировкой
             with open(env_file, 'r', encoding='utf-8') as f:
                 lines = f.readlines()
             
-            found = False
+            pending = dict(updates)
             new_lines = []
             for line in lines:
-                if line.startswith(f'{param}='):
-                    new_lines.append(f'{param}={value}\n')
-                    found = True
+                param = line.split('=', 1)[0] if '=' in line else None
+                if param in pending:
+                    new_lines.append(f'{param}={pending.pop(param)}\n')
                 else:
                     new_lines.append(line)
             
-            if not found:
-                new_lines.append(f'{param}={value}\n')
+            # Параметры, которых еще не было в файле, дописываем в конец
+            new_lines.extend(f'{param}={value}\n' for param, value in pending.items())
+            
+            # Значения на диске уже совпадают — перезапись и резервная копия не нужны
+            if new_lines == lines:
+                self.logger.debug(f".env already up to date: {', '.join(updates)}")
+                return
+            
+            # Создаем резервную копию
+            backup_file = '.env.bak'
+            shutil.copyfile(env_file, backup_file)
             
             # Сохраняем с правильной кодировкой
-            with open(env_file, 'w', encoding='utf-8') as f:
+            tmp_file = f'{env_file}.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 f.writelines(new_lines)
+            os.replace(tmp_file, env_file)
                 
-            self.logger.info(f"Updated .env parameter: {param}={value}")
+            for param, value in updates.items():
+                self.logger.info(f"Updated .env parameter: {param}={value}")
         except Exception as e:
             self.logger.error(f"Failed to update .env file: {str(e)}", exc_info=True)
 
@@ -620,8 +747,10 @@ class Config:
         """Сохраняет настройки RSS в .env"""
         self.RSS_URLS = urls
         self.RSS_ACTIVE = active
-        self.save_to_env_file("RSS_URLS", json.dumps(urls))
-        self.save_to_env_file("RSS_ACTIVE", json.dumps(active))
+        self.save_many_to_env_file({
+            "RSS_URLS": dumps_env_json(urls),
+            "RSS_ACTIVE": dumps_env_json(active),
+        })
 
     async def refresh_rss_status(self, callback: CallbackQuery):
         """Обновление статуса RSS"""
@@ -705,7 +834,7 @@ class Config:
         try:
             if var_type is bool:
                 if isinstance(value, str):
-                    return value.lower() in ['true', '1', 'yes', 'y', 't', 'on']
+                    return value.lower() in _TRUE_STRINGS
                 return bool(value)
             elif var_type is int:
                 return int(value)
@@ -733,12 +862,7 @@ class Config:
             return False
             
         try:
-            # Преобразование типа
-            current_type = type(getattr(self, param))
-            if current_type is bool:
-                converted_value = value.lower() in ['true', '1', 'yes', 'y', 't', 'on'] if isinstance(value, str) else bool(value)
-            else:
-                converted_value = current_type(value)
+            converted_value = self._convert_param(param, value)
             
             # Установка значения
             setattr(self, param, converted_value)
@@ -750,6 +874,37 @@ class Config:
             logger.error(f"Ошибка преобразования значения: {str(e)}")
             return False
 
+    def update_params(self, changes: Dict[str, Any]) -> bool:
+        """Обновляет несколько параметров и сохраняет их в .env одной перезаписью файла.
+        Возвращает False, если хотя бы один параметр не удалось применить."""
+        env_updates = {}
+        ok = True
+        for param, value in changes.items():
+            if not hasattr(self, param):
+                logger.error(f"Параметр {param} не существует")
+                ok = False
+                continue
+            try:
+                converted_value = self._convert_param(param, value)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Ошибка преобразования значения {param}: {str(e)}")
+                ok = False
+                continue
+            setattr(self, param, converted_value)
+            env_updates[param] = str(converted_value)
+            logger.info(f"Параметр {param} обновлен на {converted_value}")
+        
+        if env_updates:
+            self.save_many_to_env_file(env_updates)
+        return ok
+
+    def _convert_param(self, param: str, value: Any) -> Any:
+        """Приводит значение к типу текущего значения параметра"""
+        current_type = type(getattr(self, param))
+        if current_type is bool:
+            return value.lower() in _TRUE_STRINGS if isinstance(value, str) else bool(value)
+        return current_type(value)
+
     def get_list(self, key: str, default: list) -> list:
         value = os.getenv(key)
         if value is None:
@@ -248,6 +248,7 @@ class AsyncImageGenerator:
 
     def restart_executor(self):
         """Пересоздает executor после shutdown"""
-        if hasattr(self, 'executor'):
-            self.executor.shutdown(wait=True)
+        executor = getattr(self, 'executor', None)
+        if executor is not None:
+            executor.shutdown(wait=True)
         self.executor = ThreadPoolExecutor(max_workers=self.config.IMAGE_GENERATION_WORKERS)
\ No newline at end of file
@@ -179,7 +179,8 @@ async def run_bot():
     connector = aiohttp.TCPConnector(
         force_close=True,
         enable_cleanup_closed=True,
-        limit=0
+        limit=0,
+        limit_per_host=config.HTTP_LIMIT_PER_HOST
     )
     
     # Инициализируем переменные для управления ресурсами
@@ -401,6 +402,13 @@ async def check_internet_connection(session):
         await asyncio.sleep(60)
         
 if __name__ == "__main__":
+    # uvloop (если установлен) заметно ускоряет сетевой ввод-вывод; на Windows недоступен
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Создаем новый цикл событий
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
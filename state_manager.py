@@ -318,6 +318,12 @@ class StateManager:
         if len(self.state['sent_entries']) > self.max_entries * 1.2:
             self.cleanup_old_entries()
 
+    def clear_sent_entries(self) -> bool:
+        """Очищает историю отправленных постов и сохраняет состояние одной записью"""
+        self.state['sent_entries'] = OrderedDict()
+        logger.info("Sent entries history cleared")
+        return self.save_state()
+
     def _generate_content_hash(self, post: Dict) -> Optional[str]:
         """Генерирует хеш для контента поста"""
         try:
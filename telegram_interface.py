@@ -1,34 +1,436 @@
 import asyncio
-from collections import deque
-import json
-import os
+import contextlib
+import heapq
+import html
 import logging
+import os
 import re
+import sys
 import time
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from state_manager import StateManager
-from typing import Optional, List, Dict, Any, Union
+from collections import ChainMap, OrderedDict, deque
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Union, Callable, Tuple
 from aiogram import Bot, Dispatcher
-from aiogram.types import Message, BotCommand, InputFile, FSInputFile, MenuButtonCommands, CallbackQuery, InputMediaPhoto, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.methods import EditMessageText
+from aiogram.types import Message, BotCommand, FSInputFile, MenuButtonCommands, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.enums import MenuButtonType
-from aiogram.filters import Command
-from config import Config
+from aiogram.filters import Command, CommandObject, Filter
+from config import Config, RSSUrlStore
 from bot_controller import BotController
 from visual_interface import UIBuilder
-from aiogram.types import BufferedInputFile
 from aiogram.types import Message as TelegramMessage
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 logger = logging.getLogger('AsyncTelegramBot')
 
+def _orjson_dumps(value: Any) -> str:
+    return orjson.dumps(value).decode()
+
+# JSON сессии Bot API: orjson, если установлен (разбор апдейтов и сериализация клавиатур)
+_SESSION_JSON = {'json_loads': orjson.loads, 'json_dumps': _orjson_dumps} if orjson is not None else {}
+
+# Ключи счетчиков для /stats (порядок соответствует строкам ответа)
+# Значения по умолчанию для счетчиков, которых еще нет в статистике контроллера
+_STATS_DEFAULTS = MappingProxyType(dict.fromkeys((
+    'posts_sent',
+    'errors',
+    'images_generated',
+    'duplicates_rejected',
+    'yagpt_used',
+    'yagpt_errors',
+), 0))
+_STATS_TEMPLATE = (
+    "📊 <b>Статистика:</b>\n"
+    "Постов: {posts_sent}\n"
+    "Ошибок: {errors}\n"
+    "Изображений: {images_generated}\n"
+    "Дубликатов отклонено: {duplicates_rejected}\n"
+    "Использований YandexGPT: {yagpt_used}\n"
+    "Ошибок YandexGPT: {yagpt_errors}"
+)
+
+_PARAMS_HEADER = "⚙️ <b>Доступные параметры:</b>\n\n"
+# Длина тела одной страницы /params_list с запасом под заголовок (лимит Telegram — 4096)
+_PARAMS_CHUNK_LIMIT = 4000 - len(_PARAMS_HEADER)
+
+_MAIN_MENU_TEXT = "🤖 <b>Управление RSS Ботом</b>\n\nВыберите действие:"
+_SETTINGS_MENU_TEXT = "⚙️ <b>Настройки бота</b>\n\nВыберите категорию:"
+_THEME_SELECTOR_TEXT = "🎨 <b>Выбор темы оформления</b>\n\nВыберите стиль интерфейса:"
+_NOTIFY_SETTINGS_TEXT = (
+    "🔔 <b>Настройки уведомлений</b>\n\n"
+    "Здесь будут настройки уведомлений\n"
+    "Функция в разработке"
+)
+
+# Шаблон ответа /settings: динамические значения подставляются через format_map
+_SETTINGS_TEMPLATE = (
+    "⚙️ <b>Текущие настройки:</b>\n"
+    "YandexGPT: {yagpt}\n"
+    "Изображения: {images}\n"
+    "Источник изображений: {source}\n"
+    "Резервная генерация: {fallback}\n"
+    "Постов/час: {posts_per_hour}\n"
+    "Модель YandexGPT: {model}"
+)
+_SOURCE_MAPPING = MappingProxyType({
+    'template': 'Шаблоны',
+    'original': 'Оригиналы',
+    'none': 'Нет'
+})
+_ON_OFF = ('🔴 Выкл', '🟢 Вкл')
+_RSS_LIST_HEADER = "📡 <b>Статус RSS-лент</b>\n\n"
+
+# Строки, считающиеся истиной в /set и /set_all
+_BOOL_TRUE = frozenset({'true', '1', 'yes', 'y', 't', 'on', 'да'})
+
+
+def _parse_bool(text: str) -> bool:
+    # Обычно значение уже в нижнем регистре — тогда lower() не нужен
+    return text in _BOOL_TRUE or text.lower() in _BOOL_TRUE
+
+_SET_YAGPT_MODELS = frozenset({'yandexgpt-lite', 'yandexgpt-pro'})
+
+# Параметры, доступные команде /set: тип, проверка и текст ошибки (строятся один раз при импорте)
+_SET_ALLOWED_PARAMS = MappingProxyType({
+    'POSTS_PER_HOUR': {'type': int, 'validator': lambda x: 1 <= x <= 60, 'error_msg': 'Должно быть целое число от 1 до 60'},
+    'MIN_DELAY_BETWEEN_POSTS': {'type': int, 'validator': lambda x: x >= 10, 'error_msg': 'Минимальная задержка 10 секунд'},
+    'CHECK_INTERVAL': {'type': int, 'validator': lambda x: x >= 60, 'error_msg': 'Интервал проверки не менее 60 секунд'},
+    'ENABLE_IMAGE_GENERATION': {'type': bool, 'validator': None},
+    'ENABLE_YAGPT': {'type': bool, 'validator': None},
+    'YAGPT_MODEL': {'type': str, 'validator': _SET_YAGPT_MODELS.__contains__, 'error_msg': 'Допустимые модели: yandexgpt-lite, yandexgpt-pro'},
+    'YAGPT_TEMPERATURE': {'type': float, 'validator': lambda x: 0.1 <= x <= 1.0, 'error_msg': 'Температура должна быть от 0.1 до 1.0'}
+})
+
+
+# Преобразование строкового значения /set_all по типу текущего значения параметра
+_CONVERTERS: Dict[type, Callable[[str], Any]] = {
+    bool: _parse_bool,
+    int: int,
+    float: float,
+    list: lambda text: list(map(str.strip, text.split(','))),
+    tuple: lambda text: tuple(map(int, text.split(','))),
+    str: lambda text: text,
+}
+
+# Описания и примеры значений по типу параметра для /param_info
+_TYPE_DESCRIPTIONS = MappingProxyType({
+    int: 'целое число',
+    float: 'число с плавающей точкой',
+    bool: 'логическое значение (true/false)',
+    str: 'строка',
+    list: 'список значений (через запятую)',
+    tuple: 'кортеж чисел (через запятую)'
+})
+_TYPE_EXAMPLES = MappingProxyType({
+    int: "42",
+    float: "3.14",
+    bool: "true или false",
+    str: "любая строка",
+    list: "item1, item2, item3",
+    tuple: "255, 255, 255"
+})
+
+@lru_cache(maxsize=256)
+def _render_param_info(param_name: str, value_type: type, value_str: str) -> str:
+    """Ответ /param_info; ключ кэша включает текущее значение, поэтому сброс после /set_all не нужен"""
+    type_name = value_type.__name__
+    type_description = _TYPE_DESCRIPTIONS.get(value_type, type_name)
+    examples = _TYPE_EXAMPLES.get(value_type, value_str)
+    current = _html_text(value_str)
+    return (
+        f"ℹ️ <b>Информация о параметре:</b>\n\n"
+        f"<b>Имя:</b> {param_name}\n"
+        f"<b>Тип:</b> {type_name} ({type_description})\n"
+        f"<b>Текущее значение:</b> {current}\n\n"
+        f"<b>Примеры значений:</b>\n"
+        f"{_html_text(examples)}\n\n"
+        f"<b>Изменить командой:</b>\n"
+        f"<code>/set_all {param_name} [новое_значение]</code>"
+    )
+
+# Ответы /set_all
+_SET_ALL_OK_TEMPLATE = (
+    "✅ <b>Параметр успешно обновлен!</b>\n\n"
+    "<b>Параметр:</b> {name}\n"
+    "<b>Старое значение:</b> {old}\n"
+    "<b>Новое значение:</b> {new}\n\n"
+)
+_SET_ALL_ERROR_TEMPLATE = (
+    "❌ <b>Ошибка преобразования значения:</b>\n"
+    "Параметр: {name}\n"
+    "Требуемый тип: {type}\n"
+    "Ошибка: {error}"
+)
+
+
+def _format_conversion_error(param_name: str, value_type: type, error: Exception) -> str:
+    """Текст ошибки /set_all (редкая ветка, вынесена из обработчика)"""
+    return _SET_ALL_ERROR_TEMPLATE.format(
+        name=param_name,
+        type=value_type.__name__,
+        error=_html_text(str(error)),
+    )
+
+# Параметры, изменение которых вступает в силу только после перезапуска
+_RESTART_PARAMS = frozenset({'TOKEN', 'CHANNEL_ID', 'OWNER_ID', 'YANDEX_API_KEY'})
+_RESTART_NOTE = "⚠️ <i>Для применения изменений может потребоваться перезагрузка бота</i>"
+
+# Меню команд в строке ввода (одинаково для всех запусков)
+_COMMANDS: Tuple[BotCommand, ...] = (
+    BotCommand(command="start", description="Главное меню"),
+    BotCommand(command="menu", description="Открыть панель управления"),
+    BotCommand(command="help", description="Помощь"),
+    BotCommand(command="status", description="Статус бота"),
+    BotCommand(command="stats", description="Статистика"),
+    BotCommand(command="rss_list", description="Список RSS-лент"),
+    BotCommand(command="rss_add", description="Добавить RSS"),
+    BotCommand(command="rss_remove", description="Удалить RSS"),
+    BotCommand(command="pause", description="Приостановить"),
+    BotCommand(command="resume", description="Возобновить"),
+    BotCommand(command="settings", description="Текущие настройки"),
+    BotCommand(command="set", description="Изменить параметр"),
+    BotCommand(command="clear_history", description="Очистить историю постов"),
+    BotCommand(command="params_list", description="Список всех параметров"),
+    BotCommand(command="param_info", description="Информация о параметре"),
+    BotCommand(command="set_all", description="Изменить любой параметр"),
+)
+_MENU_BUTTON = MenuButtonCommands(type=MenuButtonType.COMMANDS)
+
+# Классификация ошибок отправки: недоступный канал критичен, флуд-лимит - нет
+_SEND_ERROR_CLASSIFIER = re.compile(r"(chat not found|forbidden|too many requests)", re.IGNORECASE)
+_SEND_ERROR_LOGGERS = {
+    'chat not found': logger.critical,
+    'forbidden': logger.critical,
+    'too many requests': logger.warning,
+}
+
+@lru_cache(maxsize=128)
+def _fs_input(path: str) -> FSInputFile:
+    """Переиспользуемая обертка FSInputFile для повторяющихся путей изображений"""
+    return FSInputFile(path)
+
+@lru_cache(maxsize=None)
+def _cancel_keyboard(callback_data: str) -> InlineKeyboardMarkup:
+    """Клавиатура с единственной кнопкой отмены (неизменна, строится один раз на callback_data)"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="❌ Отмена", callback_data=callback_data)]
+    ])
+
+@lru_cache(maxsize=64)
+def _retry_keyboard(param: str, param_type: str) -> InlineKeyboardMarkup:
+    """Клавиатура повтора ввода после ошибки валидации"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="↩️ Повторить ввод", callback_data=f"retry_{param}"),
+            InlineKeyboardButton(text="❌ Отмена", callback_data=f"cancel_edit_{param_type}")
+        ]
+    ])
+
+_BACK_TO_MAIN_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="◀️ Назад в меню", callback_data="main_menu")]
+])
+
+@lru_cache(maxsize=64)
+def _params_page_keyboard(page: int, total: int) -> Optional[InlineKeyboardMarkup]:
+    """Листание страниц /params_list; для одной страницы клавиатура не нужна"""
+    if total <= 1:
+        return None
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton(text="◀️", callback_data=f"params_page_{page - 1}"))
+    row.append(InlineKeyboardButton(text=f"Стр. {page + 1}/{total}", callback_data=f"params_page_{page}"))
+    if page < total - 1:
+        row.append(InlineKeyboardButton(text="▶️", callback_data=f"params_page_{page + 1}"))
+    return InlineKeyboardMarkup(inline_keyboard=[row])
+
+# Подсказки формата для ручного ввода основных параметров
+_PARAM_EXAMPLES = MappingProxyType({
+    'temperature': "0.1-1.0 (например: 0.7)",
+    'max_tokens': "500-10000 (например: 2500)",
+    'check_interval': "60-86400 сек (например: 300 или 5m)",
+    'min_delay_between_posts': "10-3600 сек (например: 60)",
+    'posts_per_hour': "1-100 (например: 10)"
+})
+
+_HTML_PARSE = "HTML"
+
+def _html_text(text: str) -> str:
+    """Экранирует текст для HTML-разметки Telegram (уже экранированные сущности не удваиваются)"""
+    return html.escape(html.unescape(text), quote=False)
+
+@lru_cache(maxsize=256)
+def _compose_post(title: str, description: str, link: str) -> str:
+    """Собирает HTML поста; повторная отправка того же поста берет готовый текст"""
+    # Экранирование исключает отказ Telegram из-за битой разметки (лишний RTT)
+    return "".join((
+        "<b>", _html_text(title), "</b>\n\n",
+        _html_text(description),
+        "\n\n<a href='", html.escape(link), "'>Читать далее</a>",
+    ))
+
+# Предкомпилированные шаблоны валидации пользовательского ввода
+_TEMP_RE = re.compile(r'\A(?:\d+(?:\.\d*)?|\.\d+)\Z')  # 0.5, .5, 0., 1
+_INTERVAL_MULTIPLIERS = {'s': 1, 'm': 60, 'h': 3600}
+_SCHEDULE_TIME_RE = re.compile(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$')
+_TRUE_VALUES = frozenset(('true', '1', 'yes', 'y', 'on', 'вкл', 'да'))
+_FALSE_VALUES = frozenset(('false', '0', 'no', 'n', 'off', 'выкл', 'нет'))
+
+
+def _fmt_seq(value: Union[list, tuple]) -> str:
+    if len(value) <= 3:
+        return str(value)
+    return f"{value[:3]}... ({len(value)} items)"
+
+
+def _fmt_str(value: str) -> str:
+    return value if len(value) <= 50 else value[:50] + "..."
+
+
+# Форматирование значений параметров для /params_list по точному типу значения
+_PARAM_FORMATTERS: Dict[type, Callable[[Any], str]] = {
+    list: _fmt_seq,
+    tuple: _fmt_seq,
+    RSSUrlStore: _fmt_seq,
+    str: _fmt_str,
+}
+
+# Суффиксы callback_data кнопок управления RSS-лентами
+_RSS_TOGGLE_RE = re.compile(r'([0-9]+)_(enable|disable)')
+_RSS_REMOVE_RE = re.compile(r'[0-9]+')
+
+class OutboundLimiter(BaseRequestMiddleware):
+    """Token bucket на все исходящие запросы к Bot API (глобальный лимит Telegram ~30 в секунду).
+    Правки одного сообщения, ожидающие токена, схлопываются: уходит только самая свежая.
+    Для групп и каналов дополнительно держится скользящее окно 20 сообщений в минуту.
+    После 429 все запросы ждут retry_after, а скорость бакета снижается вдвое и
+    восстанавливается постепенно по мере успешных запросов."""
+
+    CHAT_LIMIT = 20  # Сообщений в группу/канал за окно
+    CHAT_WINDOW = 60.0  # Окно лимита группы/канала, сек
+    CHAT_WINDOWS_SWEEP = 256  # При стольких окнах в словаре удаляются окна без отправок за CHAT_WINDOW
+    MIN_RATE = 1.0
+    RATE_RECOVERY = 0.5  # Прибавка к скорости за каждый успешный запрос
+
+    def __init__(self, rate: float = 30.0, capacity: int = 30):
+        self._max_rate = rate
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()  # FIFO: запросы получают токены в порядке поступления
+        self._edit_seq: Dict[Tuple[Any, int], int] = {}
+        self._paused_until = 0.0
+        self._chat_windows: Dict[Any, deque] = {}
+
+    async def _acquire(self) -> None:
+        async with self._lock:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+    async def _acquire_chat(self, chat_id: Any) -> None:
+        """Скользящее окно на группу/канал; ожидание одного чата не держит глобальную очередь"""
+        if len(self._chat_windows) >= self.CHAT_WINDOWS_SWEEP:
+            self._prune_chat_windows(time.monotonic())
+        window = self._chat_windows.setdefault(chat_id, deque())
+        while True:
+            now = time.monotonic()
+            while window and now - window[0] >= self.CHAT_WINDOW:
+                window.popleft()
+            if len(window) < self.CHAT_LIMIT:
+                window.append(now)
+                return
+            await asyncio.sleep(window[0] + self.CHAT_WINDOW - now)
+
+    def _prune_chat_windows(self, now: float) -> None:
+        """Удаляет окна чатов, в которые за CHAT_WINDOW ничего не отправлялось.
+        Окно с ожидающим запросом заполнено свежими отметками и под удаление не попадает"""
+        stale = [
+            chat_id for chat_id, window in self._chat_windows.items()
+            if not window or now - window[-1] >= self.CHAT_WINDOW
+        ]
+        for chat_id in stale:
+            del self._chat_windows[chat_id]
+
+    @staticmethod
+    def _is_group_chat(chat_id: Any) -> bool:
+        # Личные чаты имеют положительный id; группы и каналы — отрицательный или @username
+        return isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0)
+
+    async def __call__(self, make_request, bot, method):
+        key = None
+        if isinstance(method, EditMessageText) and method.message_id is not None:
+            key = (method.chat_id, method.message_id)
+            seq = self._edit_seq.get(key, 0) + 1
+            self._edit_seq[key] = seq
+
+        chat_id = getattr(method, 'chat_id', None)
+        if key is None and self._is_group_chat(chat_id):
+            await self._acquire_chat(chat_id)
+        await self._acquire()
+
+        if key is not None:
+            if self._edit_seq.get(key) != seq:
+                return True  # Более свежая правка этого сообщения уже отправлена или ждет очереди
+            del self._edit_seq[key]
+        try:
+            result = await make_request(bot, method)
+        except TelegramRetryAfter as e:
+            self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+            self._rate = max(self.MIN_RATE, self._rate / 2)
+            logger.warning("Telegram 429: пауза %s с, лимит снижен до %.1f/с", e.retry_after, self._rate)
+            raise
+        if self._rate < self._max_rate:
+            self._rate = min(self._max_rate, self._rate + self.RATE_RECOVERY)
+        return result
+
+class PendingInput:
+    """Ожидаемый ручной ввод параметра: одна запись вместо трех параллельных словарей"""
+    __slots__ = ('param', 'type', 'chat_id', 'expire_ts', 'retries', 'last_error')
+
+    def __init__(self, param: str, type: str, chat_id: int, expire_ts: float = 0.0):
+        self.param = param
+        self.type = type
+        self.chat_id = chat_id
+        self.expire_ts = expire_ts
+        self.retries = 0
+        self.last_error = ''
+
+class OwnerFilter(Filter):
+    """Пропускает только сообщения владельца бота"""
+    def __init__(self, owner_id: int):
+        self.owner_id = owner_id
+
+    async def __call__(self, message: Message) -> bool:
+        user = message.from_user
+        return user is not None and user.id == self.owner_id
+
 class InputValidator:
     """Класс для валидации вводимых пользователем значений"""
     @staticmethod
     def validate_temperature(text: str) -> float:
         """Валидация температуры ИИ (0.1-1.0)"""
-        if not text.replace('.', '', 1).isdigit():
+        text = text.strip()
+        if not _TEMP_RE.match(text):
             raise ValueError("Требуется числовое значение")
             
         value = float(text)
@@ -55,32 +457,28 @@ class InputValidator:
     @staticmethod
     def validate_interval(text: str) -> int:
         """Валидация интервалов времени с поддержкой единиц измерения"""
-        multipliers = {'s': 1, 'm': 60, 'h': 3600}
-        unit = text[-1].lower() if text else ''
+        text = text.strip()
+        # Быстрый путь для частого случая: целое число секунд без единиц
+        if text.isascii() and text.isdigit():
+            return max(60, min(86400, int(text)))
         
+        # Суффикс единицы отделяется по последнему символу, число разбирает float (как и 1e3)
+        multiplier = _INTERVAL_MULTIPLIERS.get(text[-1:].lower())
         try:
-            if unit in multipliers:
-                num = float(text[:-1])
-                value = num * multipliers[unit]
-            else:
-                value = float(text)
-                
-            # Ограничения: 60 сек - 24 часа
-            value = max(60, min(86400, value))
-            return int(value)
+            value = float(text[:-1]) * multiplier if multiplier else float(text)
         except ValueError:
             raise ValueError("Формат: число[ед] (например: 5m, 300, 0.5h)")
+        
+        # Ограничения: 60 сек - 24 часа
+        return int(max(60, min(86400, value)))
 
     @staticmethod
     def validate_boolean(text: str) -> bool:
         """Валидация булевых значений"""
-        true_values = ['true', '1', 'yes', 'y', 'on', 'вкл', 'да']
-        false_values = ['false', '0', 'no', 'n', 'off', 'выкл', 'нет']
-        
         clean_text = text.strip().lower()
-        if clean_text in true_values:
+        if clean_text in _TRUE_VALUES:
             return True
-        if clean_text in false_values:
+        if clean_text in _FALSE_VALUES:
             return False
             
         raise ValueError("Используйте: да/нет, вкл/выкл, true/false")
@@ -110,7 +508,7 @@ class InputValidator:
                 continue
                 
             # Проверка формата ЧЧ:ММ
-            if re.match(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$', part):
+            if _SCHEDULE_TIME_RE.match(part):
                 times.append(part)
             else:
                 errors.append(part)
@@ -133,22 +531,82 @@ class InputValidator:
             
         return times
 
+# Валидаторы ручного ввода основных параметров; остальные проверяются как целое 1-10000
+_GENERAL_VALIDATORS: MappingProxyType = MappingProxyType({
+    'temperature': InputValidator.validate_temperature,
+    'yagpt_temperature': InputValidator.validate_temperature,
+    'max_tokens': InputValidator.validate_tokens,
+    'yagpt_max_tokens': InputValidator.validate_tokens,
+    'check_interval': InputValidator.validate_interval,
+    'min_delay_between_posts': InputValidator.validate_interval,
+    'enable_yagpt': InputValidator.validate_boolean,
+    'image_fallback': InputValidator.validate_boolean,
+})
+
 class AsyncTelegramBot:
+    INPUT_TIMEOUT = 300  # Время ожидания ручного ввода, сек
+    SEND_RETRIES = 2  # Повторы отправки поста после 429
+    RSS_STATUS_TTL = 1.0  # Сколько переиспользовать статус RSS-лент, сек
+    INTRUSION_ALERT_INTERVAL = 60.0  # Не чаще одного уведомления владельцу на пользователя, сек
+    FILE_ID_CACHE_LIMIT = 128  # Сколько загруженных изображений помнить по file_id
+    LAST_RENDER_LIMIT = 512  # Сколько сообщений помнить для пропуска повторной отрисовки
+
     def __init__(self, token: str, channel_id: str, config: Config):
         self.token = token
         self.channel_id = channel_id
         self.config = config
-        self.bot = Bot(token=token)
+        # Имена параметров конфигурации, доступных через /param_info, /set_all и /params_list
+        self._config_params = frozenset(
+            name for name in dir(config)
+            if name.isupper() and not name.startswith('_') and not callable(getattr(config, name))
+        )
+        # Тот же набор в порядке вывода /params_list: сортируется один раз, а не при каждой пересборке
+        self._config_params_sorted: Tuple[str, ...] = tuple(sorted(self._config_params))
+        self._owner_filter = OwnerFilter(-1)
+        self._sync_owner_id()
+        # Пул соединений с keep-alive, чтобы посты не платили за новый TCP+TLS
+        session = AiohttpSession(limit=20, **_SESSION_JSON)
+        # У AiohttpSession нет публичного способа передать аргументы TCPConnector: используем
+        # приватный _connector_init (aiogram 3.21, см. requirements.txt). Если в другой версии
+        # его нет, сессия просто работает с настройками коннектора по умолчанию
+        connector_init = getattr(session, "_connector_init", None)
+        if isinstance(connector_init, dict):
+            connector_init.update(ttl_dns_cache=300, keepalive_timeout=60)
+        else:
+            logger.warning("AiohttpSession без _connector_init: keep-alive настройки не применены")
+        session.middleware(OutboundLimiter())
+        self.bot = Bot(token=token, session=session)
         self.dp = Dispatcher()
         self.controller: Optional[BotController] = None
         self.ui = UIBuilder(config)
-        self.pending_input = {}  # user_id: {'param': param_name, 'type': 'general'}
-        self.pending_input_timeouts = {}
-        self.pending_input_retries = {}
+        self.pending_input: Dict[int, PendingInput] = {}
+        self._timeout_heap: List[Tuple[float, int]] = []  # (время истечения, user_id)
         self.validator = InputValidator()
+        # Сериализация обработки по чатам: chat_id -> [lock, число ожидающих событий]
+        self._chat_locks: Dict[int, list] = {}
+        # Склейка серии текстовых сообщений: chat_id -> сообщения и таймер сброса
+        self._msg_batch: Dict[int, List[Message]] = {}
+        self._msg_batch_timer: Dict[int, asyncio.TimerHandle] = {}
+        self._batch_tasks: set = set()
+        # Отложенные перерисовки экранов после сохранения настроек
+        self._bg_tasks: set = set()
+        self._reshow_tasks: Dict[int, asyncio.Task] = {}
+        # Время последнего уведомления о попытке доступа: user_id -> monotonic
+        self._intrusion_alerts: Dict[int, float] = {}
+        # Последний отрисованный экран: (chat_id, message_id) -> (хэш текста, хэш клавиатуры, edit_date)
+        self._last_render: "OrderedDict[Tuple[int, int], Tuple[int, int, Any]]" = OrderedDict()
+        # Статус RSS-лент, переиспользуемый при серии нажатий: (monotonic, feeds)
+        self._rss_cache: Optional[Tuple[float, List[Dict]]] = None
+        # Уже загруженные в Telegram изображения: (путь, mtime_ns, размер) -> file_id
+        self._file_id_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        # Готовые сообщения /params_list и версия конфига, для которой они собраны
+        self._params_cache_version: int = -1
+        self._params_cache: List[str] = []
 
         # Запуск фоновой задачи очистки
-        self.cleanup_task = asyncio.create_task(self._cleanup_pending_inputs())
+        self.cleanup_task = asyncio.create_task(self._cleanup_pending_inputs(), name="pending-input-cleanup")
+        self.cleanup_task.add_done_callback(self._on_background_task_done)
+        self._build_callback_routes()
         self.dp.message.register(self.handle_set_schedule, Command("set_schedule"))
         self._register_handlers()
     
@@ -158,26 +616,13 @@ class AsyncTelegramBot:
         
     async def setup_commands(self) -> None:
         """Устанавливает меню команд в строке ввода"""
-        commands = [
-            BotCommand(command="start", description="Главное меню"),
-            BotCommand(command="menu", description="Открыть панель управления"),
-            BotCommand(command="help", description="Помощь"),
-            BotCommand(command="status", description="Статус бота"),
-            BotCommand(command="stats", description="Статистика"),
-            BotCommand(command="rss_list", description="Список RSS-лент"),
-            BotCommand(command="rss_add", description="Добавить RSS"),
-            BotCommand(command="rss_remove", description="Удалить RSS"),
-            BotCommand(command="pause", description="Приостановить"),
-            BotCommand(command="resume", description="Возобновить"),
-            BotCommand(command="settings", description="Текущие настройки"),
-            BotCommand(command="set", description="Изменить параметр"),
-            BotCommand(command="clear_history", description="Очистить историю постов"),
-            BotCommand(command="params_list", description="Список всех параметров"),
-            BotCommand(command="param_info", description="Информация о параметре"),
-            BotCommand(command="set_all", description="Изменить любой параметр"),
-        ]
-        await self.bot.set_my_commands(commands)
-        await self.bot.set_chat_menu_button(menu_button=MenuButtonCommands(type=MenuButtonType.COMMANDS))
+        # Прогрев соединения: первый пост не будет ждать TLS-рукопожатия
+        await self.bot.get_me()
+        # Команды и кнопка меню независимы: оба запроса идут одновременно по уже открытому соединению
+        await asyncio.gather(
+            self.bot.set_my_commands(_COMMANDS),
+            self.bot.set_chat_menu_button(menu_button=_MENU_BUTTON)
+        )
     
     async def send_post(
         self,
@@ -188,33 +633,65 @@ class AsyncTelegramBot:
     ) -> bool:
         """Отправляет пост в Telegram канал"""
         try:
-            post_text = f"<b>{title}</b>\n\n{description}\n\n<a href='{link}'>Читать далее</a>"
+            post_text = _compose_post(title, description, link)
             
+            # Один stat вместо отдельной проверки существования: пропавшая картинка
+            # не отменяет пост, он уходит текстом
+            st = None
             if image_path:
-                if not os.path.exists(image_path):
-                    logger.error(f"Изображение не найдено: {image_path}")
-                    return False
-                    
-                photo = FSInputFile(image_path)
-                await self.bot.send_photo(
+                try:
+                    st = os.stat(image_path)
+                except FileNotFoundError:
+                    logger.warning("Изображение не найдено, пост без него: %s", image_path)
+            
+            if st is not None:
+                # Повторно отправляемый файл не загружается заново: Telegram принимает file_id.
+                # mtime и размер в ключе не дают отправить старую картинку после перезаписи файла
+                file_key = (image_path, st.st_mtime_ns, st.st_size)
+                file_id = self._file_id_cache.get(file_key)
+                sent = await self._send_with_retry(
+                    self.bot.send_photo,
                     chat_id=self.channel_id,
-                    photo=photo,
+                    photo=file_id or _fs_input(image_path),
                     caption=post_text,
-                    parse_mode="HTML"
+                    parse_mode=_HTML_PARSE
                 )
-                logger.info(f"Отправлен пост с изображением: {title[:50]}...")
+                if file_id is not None:
+                    self._file_id_cache.move_to_end(file_key)
+                elif isinstance(sent, Message) and sent.photo:
+                    self._file_id_cache[file_key] = sent.photo[-1].file_id
+                    if len(self._file_id_cache) > self.FILE_ID_CACHE_LIMIT:
+                        self._file_id_cache.popitem(last=False)
+                logger.info("Отправлен пост с изображением: %.50s...", title)
             else:
-                await self.bot.send_message(
+                await self._send_with_retry(
+                    self.bot.send_message,
                     chat_id=self.channel_id,
                     text=post_text,
-                    parse_mode="HTML"
+                    parse_mode=_HTML_PARSE
                 )
-                logger.info(f"Отправлен текстовый пост: {title[:50]}...")
+                logger.info("Отправлен текстовый пост: %.50s...", title)
                 
             return True
+        except FileNotFoundError:
+            logger.error("Изображение не найдено: %s", image_path)
+            return False
         except Exception as e:
-            logger.error(f"Ошибка отправки поста '{title[:30]}...': {str(e)}")
+            err_str = str(e)
+            match = _SEND_ERROR_CLASSIFIER.search(err_str)
+            log = _SEND_ERROR_LOGGERS[match.group(1).lower()] if match else logger.error
+            log("Ошибка отправки поста '%.30s...': %s", title, err_str)
             return False
+
+    async def _send_with_retry(self, method: Callable, **kwargs) -> Any:
+        """Выполняет запрос отправки; после 429 повторяет его, чтобы пост не терялся.
+        Частоту и паузу retry_after соблюдает OutboundLimiter, поэтому здесь своих задержек нет"""
+        for attempt in range(self.SEND_RETRIES + 1):
+            try:
+                return await method(**kwargs)
+            except TelegramRetryAfter:
+                if attempt == self.SEND_RETRIES:
+                    raise
     
     async def send_message(
         self,
@@ -233,24 +710,31 @@ class AsyncTelegramBot:
             )
             return True
         except Exception as e:
-            logger.error(f"Ошибка отправки сообщения: {str(e)}")
+            logger.error("Ошибка отправки сообщения: %s", e)
             return False
         
     def _register_handlers(self) -> None:
+        # События одного чата обрабатываются по порядку, разных чатов - параллельно
+        self.dp.message.outer_middleware(self._serialize_per_chat)
+        self.dp.callback_query.outer_middleware(self._serialize_per_chat)
+
+        # Админские команды доступны только владельцу: фильтр отсекает чужие
+        # сообщения до вызова обработчика, и они попадают в handle_message
+        owner_only = self._owner_filter
         self.dp.message.register(self.handle_start, Command("start", "help", "menu"))
-        self.dp.message.register(self.handle_status, Command("status"))
-        self.dp.message.register(self.handle_stats, Command("stats"))
+        self.dp.message.register(self.handle_status, Command("status"), owner_only)
+        self.dp.message.register(self.handle_stats, Command("stats"), owner_only)
         self.dp.message.register(self.handle_rss_list, Command("rss_list"))
-        self.dp.message.register(self.handle_rss_add, Command("rss_add"))
-        self.dp.message.register(self.handle_rss_remove, Command("rss_remove"))
-        self.dp.message.register(self.handle_pause, Command("pause"))
-        self.dp.message.register(self.handle_resume, Command("resume"))
-        self.dp.message.register(self.handle_settings, Command("settings"))
-        self.dp.message.register(self.handle_set, Command("set"))
-        self.dp.message.register(self.handle_clear_history, Command("clear_history"))
-        self.dp.message.register(self.handle_params_list, Command("params_list"))
-        self.dp.message.register(self.handle_param_info, Command("param_info"))
-        self.dp.message.register(self.handle_set_all, Command("set_all"))
+        self.dp.message.register(self.handle_rss_add, Command("rss_add"), owner_only)
+        self.dp.message.register(self.handle_rss_remove, Command("rss_remove"), owner_only)
+        self.dp.message.register(self.handle_pause, Command("pause"), owner_only)
+        self.dp.message.register(self.handle_resume, Command("resume"), owner_only)
+        self.dp.message.register(self.handle_settings, Command("settings"), owner_only)
+        self.dp.message.register(self.handle_set, Command("set"), owner_only)
+        self.dp.message.register(self.handle_clear_history, Command("clear_history"), owner_only)
+        self.dp.message.register(self.handle_params_list, Command("params_list"), owner_only)
+        self.dp.message.register(self.handle_param_info, Command("param_info"), owner_only)
+        self.dp.message.register(self.handle_set_all, Command("set_all"), owner_only)
         self.dp.message.register(self.handle_message)
         self.dp.message.register(self.handle_set_schedule, Command("set_schedule"))
         self.dp.message.register(self.handle_set_mode, Command('set_mode'))
@@ -266,6 +750,153 @@ class AsyncTelegramBot:
         self.dp.callback_query.register(self.handle_switch_publication_mode, lambda c: c.data == "switch_publication_mode")
         self.dp.callback_query.register(self.handle_set_publication_mode, lambda c: c.data.startswith("set_mode_"))
 
+    async def _serialize_per_chat(self, handler: Callable, event: Any, data: Dict[str, Any]) -> Any:
+        """Outer-middleware: FIFO-очередь обработки на каждый чат.
+        aiogram обрабатывает апдейты параллельно, поэтому без нее быстрые нажатия в одном
+        чате могли гоняться за pending_input, а медленный чат не должен задерживать другие."""
+        chat = getattr(event, 'chat', None)
+        if chat is None and isinstance(event, CallbackQuery) and event.message:
+            chat = event.message.chat
+        if chat is None:
+            return await handler(event, data)
+
+        async with self._chat_lock(chat.id):
+            return await handler(event, data)
+
+    @contextlib.asynccontextmanager
+    async def _chat_lock(self, chat_id: int):
+        """Эксклюзивный доступ к обработке событий чата"""
+        entry = self._chat_locks.get(chat_id)
+        if entry is None:
+            entry = self._chat_locks[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:  # Простаивающий чат не держит lock в памяти
+                del self._chat_locks[chat_id]
+
+    @staticmethod
+    def _render_digest(text: str, keyboard: Optional[InlineKeyboardMarkup]) -> Tuple[int, int]:
+        return hash(text), hash(repr(keyboard.inline_keyboard) if keyboard else None)
+
+    def _remember_render(self, sent: Any, text: str, keyboard: Optional[InlineKeyboardMarkup]) -> None:
+        """Запоминает содержимое, отправленное через edit_text/edit_reply_markup"""
+        if not isinstance(sent, Message):
+            return
+        key = (sent.chat.id, sent.message_id)
+        self._last_render[key] = (*self._render_digest(text, keyboard), sent.edit_date)
+        self._last_render.move_to_end(key)
+        if len(self._last_render) > self.LAST_RENDER_LIMIT:
+            self._last_render.popitem(last=False)
+
+    async def _edit_screen(
+        self,
+        callback: CallbackQuery,
+        text: str,
+        keyboard: Optional[InlineKeyboardMarkup],
+        parse_mode: Optional[str] = _HTML_PARSE
+    ) -> None:
+        """Показывает экран в сообщении callback'а.
+        Неизмененный экран не отправляется вовсе, при смене одной клавиатуры правится только она,
+        а если сообщение править нельзя — экран уходит новым сообщением.
+        edit_date сверяется, чтобы не доверять кэшу после правки, сделанной в обход него."""
+        msg = callback.message
+        text_hash, keyboard_hash = self._render_digest(text, keyboard)
+        cached = self._last_render.get((msg.chat.id, msg.message_id))
+        same_text = cached is not None and cached[2] == msg.edit_date and cached[0] == text_hash
+        if same_text and cached[1] == keyboard_hash:
+            return
+        
+        try:
+            if same_text:
+                sent = await msg.edit_reply_markup(reply_markup=keyboard)
+            else:
+                sent = await msg.edit_text(text=text, reply_markup=keyboard, parse_mode=parse_mode)
+            self._remember_render(sent, text, keyboard)
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                logger.debug("Экран не изменился: %s", msg.message_id)
+                return
+            await self.bot.send_message(chat_id=msg.chat.id, text=text, reply_markup=keyboard, parse_mode=parse_mode)
+        except Exception:
+            await self.bot.send_message(chat_id=msg.chat.id, text=text, reply_markup=keyboard, parse_mode=parse_mode)
+
+    def _build_callback_routes(self) -> None:
+        """Строит таблицы диспетчеризации callback'ов: точные совпадения и префиксы"""
+        self._cb_exact: Dict[str, Callable] = {
+            "stats": self.show_statistics,
+            "monitoring": self.show_monitoring,
+            "settings": self.show_settings_menu,
+            "back_to_settings": self.show_settings_menu,
+            "settings_general": self.show_general_settings,
+            "settings_images": self.show_image_settings,
+            "settings_ai": self.show_ai_settings,
+            "settings_rss": self.show_rss_settings,
+            "settings_notify": self.show_notify_settings,
+            "rss_list": self.handle_rss_list,
+            "change_theme": self.show_theme_selector,
+            "start_bot": self.handle_start_bot,
+            "stop_bot": self.handle_stop_bot,
+            # Основные настройки
+            "edit_general_settings": self.edit_general_settings,
+            "save_general_settings": self.save_general_settings,
+            "cancel_general_edit": self.cancel_general_edit,
+            # AI настройки
+            "edit_ai_settings": self.edit_ai_settings,
+            "save_ai_settings": self.save_ai_settings,
+            "cancel_ai_edit": self.cancel_ai_edit,
+            "toggle_ai_enabled": self.toggle_ai_enabled,
+            "set_ai_temp_custom": self.set_ai_temp_custom,
+            "set_ai_tokens_custom": self.set_ai_tokens_custom,
+            # RSS настройки
+            "rss_settings": self.show_rss_settings,
+            "edit_rss_settings": partial(self.show_rss_settings, edit_mode=True),
+            "save_rss_settings": self._save_rss_settings,
+            "rss_add_start": self.start_rss_add,
+            "rss_remove_start": self.start_rss_remove,
+            "rss_refresh": self.refresh_rss_status,
+        }
+        # Префиксы проверяются по порядку только при промахе по точному совпадению;
+        # обработчик вызывается как handler(callback, suffix)
+        cb_prefix: Tuple[Tuple[str, Callable], ...] = (
+            ("set_theme_", self.set_theme),
+            ("edit_general_", self.edit_general_param),
+            ("set_general_", self.set_general_param),
+            ("edit_ai_", self.edit_ai_param),  # edit_ai_model, edit_ai_temp, edit_ai_tokens
+            ("set_ai_model:", self.set_ai_model),
+            ("set_ai_temp:", self.set_ai_temp),
+            ("set_ai_tokens:", self.set_ai_tokens),
+            ("rss_remove_", self.confirm_rss_remove),
+            ("rss_toggle_", self.toggle_rss_feed),
+            # Обработка повторного ввода и отмены
+            ("retry_", self.handle_retry_input),
+            ("cancel_edit_", self.handle_cancel_edit),
+            ("params_page_", self.show_params_page),
+        )
+        # Все префиксы проверяются одним скомпилированным выражением вместо цикла startswith;
+        # порядок альтернатив совпадает с порядком таблицы
+        self._cb_prefix: Dict[str, Callable] = dict(cb_prefix)
+        self._cb_prefix_re = re.compile("|".join(re.escape(prefix) for prefix, _ in cb_prefix))
+        # Обработчики, которые сами отвечают на callback на всех путях:
+        # для них диспетчер не шлет повторный answer()
+        self._cb_self_answering = frozenset((
+            self._save_rss_settings, self.cancel_ai_edit, self.cancel_general_edit,
+            self.edit_ai_settings, self.save_ai_settings, self.save_general_settings,
+            self.toggle_ai_enabled, self.set_ai_temp_custom, self.set_ai_tokens_custom,
+            self.refresh_rss_status, self.handle_start_bot, self.handle_stop_bot,
+            self.set_theme, self.set_general_param, self.edit_ai_param,
+            self.set_ai_model, self.set_ai_temp, self.set_ai_tokens,
+            self.confirm_rss_remove, self.toggle_rss_feed,
+            self.handle_retry_input, self.handle_cancel_edit,
+        ))
+
+    async def _save_rss_settings(self, callback: CallbackQuery) -> None:
+        await callback.answer("Настройки RSS сохранены")
+        await self.show_rss_settings(callback)
+
     async def handle_callback(self, callback: CallbackQuery) -> None:
         """Основной обработчик callback'ов"""
         try:
@@ -277,142 +908,62 @@ class AsyncTelegramBot:
             chat_id = callback.message.chat.id
             data = callback.data
 
-            logger.debug(f"Callback от пользователя {user_id}: {data}")
+            logger.debug("Callback от пользователя %s: %s", user_id, data)
+            # Любое новое нажатие важнее отложенной перерисовки после сохранения
+            self._cancel_reshow(user_id)
             
-            if data == "main_menu":
+            if data in ("main", "main_menu"):
+                handler = None
                 await self.send_main_menu(user_id, chat_id)
-            elif data == "main" or data == "main_menu":
-                await self.send_main_menu(user_id, chat_id)
-            elif data == "stats":
-                await self.show_statistics(callback)
-            elif data == "monitoring":
-                await self.show_monitoring(callback)
-            elif data == "settings":
-                await self.show_settings_menu(callback)
-            elif data == "settings_general":
-                await self.show_general_settings(callback)
-            elif data == "settings_images":
-                await self.show_image_settings(callback)
-            elif data == "settings_ai":
-                await self.show_ai_settings(callback)
-            elif data == "rss_list":
-                await self.handle_rss_list(callback)
-            elif data == "settings_rss":
-                await self.show_rss_settings(callback)
-            elif data == "settings_notify":
-                await self.show_notify_settings(callback)
-            elif data == "change_theme":
-                await self.show_theme_selector(callback)
-            elif data.startswith("set_theme_"):
-                await self.set_theme(callback)
-            elif data == "start_bot":
-                await self.handle_start_bot(callback)
-            elif data == "stop_bot":
-                await self.handle_stop_bot(callback)
-            elif data == "back_to_settings":
-                await self.show_settings_menu(callback)
-            
-            # Основные настройки
-            elif data == "settings_general":
-                await self.show_general_settings(callback)
-            elif data == "edit_general_settings":
-                await self.edit_general_settings(callback)
-            elif data.startswith("edit_general_"):
-                await self.edit_general_param(callback)
-            elif data.startswith("set_general_"):
-                await self.set_general_param(callback)
-            elif data == "save_general_settings":
-                await self.save_general_settings(callback)
-            elif data == "cancel_general_edit":
-                await self.cancel_general_edit(callback)
-
-            # AI настройки
-            elif data == "settings_ai":
-                await self.show_ai_settings(callback)
-            elif data == "edit_ai_settings":
-                await self.edit_ai_settings(callback)
-            elif data == "save_ai_settings":
-                await self.save_ai_settings(callback)
-            elif data == "cancel_ai_edit":
-                await self.cancel_ai_edit(callback)
-            elif data.startswith("edit_ai_"):  # edit_ai_model, edit_ai_temp, edit_ai_tokens
-                await self.edit_ai_param(callback)
-            elif data == "toggle_ai_enabled":
-                await self.toggle_ai_enabled(callback)
-            elif data.startswith("set_ai_model:"):
-                await self.set_ai_model(callback)
-            elif data.startswith("set_ai_temp:"):
-                await self.set_ai_temp(callback)
-            elif data == "set_ai_temp_custom":
-                await self.set_ai_temp_custom(callback)
-            elif data.startswith("set_ai_tokens:"):
-                await self.set_ai_tokens(callback)
-            elif data == "set_ai_tokens_custom":
-                await self.set_ai_tokens_custom(callback)
-            
-            # RSS настройки
-            elif data == "rss_settings":
-                await self.show_rss_settings(callback)
-            elif data == "edit_rss_settings":
-                await self.show_rss_settings(callback, edit_mode=True)
-            elif data == "save_rss_settings":
-                await callback.answer("Настройки RSS сохранены")
-                await self.show_rss_settings(callback)
-            elif data == "rss_add_start":
-                await self.start_rss_add(callback)
-            elif data == "rss_remove_start":
-                await self.start_rss_remove(callback)
-            elif data.startswith("rss_remove_"):
-                await self.confirm_rss_remove(callback)
-            elif data.startswith("rss_toggle_"):
-                await self.toggle_rss_feed(callback)
-            elif data == "rss_refresh":
-                if hasattr(self, 'refresh_rss_status'):
-                    await self.refresh_rss_status(callback)
-                else:
-                    logger.error("refresh_rss_status method missing")
-                    await callback.answer("Функция недоступна")
-            
-            # Обработка повторного ввода и отмены
-            elif data.startswith("retry_"):
-                await self.handle_retry_input(callback)
-            elif data.startswith("cancel_edit_"):
-                await self.handle_cancel_edit(callback)
-
+            elif (handler := self._cb_exact.get(data)) is not None:
+                await handler(callback)
+            elif (match := self._cb_prefix_re.match(data)) is not None:
+                handler = self._cb_prefix[match.group()]
+                # Префикс уже известен: обработчик получает готовый остаток данных
+                await handler(callback, data[match.end():])
             else:
-                logger.warning(f"Неизвестный callback: {data}")
+                logger.warning("Неизвестный callback: %s", data)
                 await callback.answer("Функция в разработке")
+                return
 
-            await callback.answer()
+            # Один answer() на callback: повторный - лишний запрос к Telegram
+            if handler not in self._cb_self_answering:
+                await callback.answer()
         except Exception as e:
-            logger.error(f"Ошибка обработки callback: {str(e)}", exc_info=True)
+            logger.error("Ошибка обработки callback: %s", e, exc_info=True)
             await callback.answer("Ошибка обработки запроса")
 
+    def _start_pending_input(self, user_id: int, param: str, param_type: str, chat_id: int) -> None:
+        """Регистрирует ожидание ввода и запускает его таймаут"""
+        expires_at = time.time() + self.INPUT_TIMEOUT
+        self.pending_input[user_id] = PendingInput(param, param_type, chat_id, expires_at)
+        heapq.heappush(self._timeout_heap, (expires_at, user_id))
+
     async def _cleanup_pending_inputs(self):
         """Очистка просроченных ожиданий ввода"""
+        heap = self._timeout_heap
         while True:
             current_time = time.time()
-            expired_users = [
-                user_id for user_id, timeout in self.pending_input_timeouts.items()
-                if timeout < current_time
-            ]
-            
-            for user_id in expired_users:
-                if user_id in self.pending_input:
-                    try:
-                        await self.bot.send_message(
-                            chat_id=self.pending_input[user_id]['chat_id'],
-                            text="⏱️ Время ввода истекло. Операция отменена."
-                        )
-                    except:
-                        pass
-                    del self.pending_input[user_id]
-                if user_id in self.pending_input_timeouts:
-                    del self.pending_input_timeouts[user_id]
-                if user_id in self.pending_input_retries:
-                    del self.pending_input_retries[user_id]
+            while heap and heap[0][0] <= current_time:
+                expires_at, user_id = heapq.heappop(heap)
+                # Запись устарела: ввод завершен, отменен или начат заново
+                entry = self.pending_input.get(user_id)
+                if entry is None or entry.expire_ts != expires_at:
+                    continue
+                
+                del self.pending_input[user_id]
+                try:
+                    await self.bot.send_message(
+                        chat_id=entry.chat_id,
+                        text="⏱️ Время ввода истекло. Операция отменена."
+                    )
+                except:
+                    pass
             
-            await asyncio.sleep(60)  # Проверка каждую минуту
+            # Новые таймауты всегда истекают не раньше чем через INPUT_TIMEOUT,
+            # поэтому достаточно спать до ближайшего истечения из кучи
+            delay = heap[0][0] - time.time() if heap else self.INPUT_TIMEOUT
+            await asyncio.sleep(max(0.05, delay))
 
     async def show_monitoring(self, callback: CallbackQuery) -> None:
         """Показывает панель мониторинга"""
@@ -424,87 +975,63 @@ class AsyncTelegramBot:
         await self.bot.send_message(
             chat_id=callback.message.chat.id,
             text=stats,
-            parse_mode="HTML"
+            parse_mode=_HTML_PARSE
         )
 
-    async def set_theme(self, callback: CallbackQuery) -> None:
+    async def set_theme(self, callback: CallbackQuery, theme_name: str) -> None:
         """Устанавливает тему оформления"""
-        theme_name = callback.data.replace("set_theme_", "")
-        if theme_name in self.ui.THEMES:
-            self.ui.user_themes[callback.from_user.id] = self.ui.THEMES[theme_name]
-            await callback.answer(f"Тема изменена на {theme_name}")
-            await self.show_settings_menu(callback)
-        else:
+        theme = self.ui.THEMES.get(theme_name)
+        if theme is None:
             await callback.answer("Неизвестная тема")
-
-    async def show_general_settings(self, callback: CallbackQuery) -> None:
-        """Показывает общие настройки"""
-        text = (
-            "⚙️ <b>Общие настройки</b>\n\n"
-            f"• Интервал проверки: {self.config.CHECK_INTERVAL} сек\n"
-            f"• Макс. постов за цикл: {self.config.MAX_POSTS_PER_CYCLE}\n"
-            f"• Постов в час: {self.config.POSTS_PER_HOUR}\n"
-            f"• Мин. задержка между постами: {self.config.MIN_DELAY_BETWEEN_POSTS} сек"
-        )
-        
-        keyboard = await self.ui.back_to_settings()
-        await callback.message.edit_text(
+            return
+        # Повторный выбор текущей темы: только подтверждение, без перерисовки
+        if self.ui.get_theme(callback.from_user.id) is theme:
+            await callback.answer(f"Тема {theme_name} уже выбрана")
+            return
+        self.ui.user_themes[callback.from_user.id] = theme
+        await callback.answer(f"Тема изменена на {theme_name}")
+        await self.show_settings_menu(callback)
+
+    async def show_ai_settings(self, callback: CallbackQuery, edit_mode: bool = False) -> None:
+        """Отображает настройки AI, редактируя сообщение callback'а"""
+        text, keyboard = await self.ui.ai_settings_view(callback.from_user.id, edit_mode)
+        await self._edit_screen(callback, text, keyboard)
+
+    async def show_ai_settings_msg(self, message: Message, edit_mode: bool = False) -> None:
+        """Отображает настройки AI ответом на текстовое сообщение"""
+        text, keyboard = await self.ui.ai_settings_view(message.from_user.id, edit_mode)
+        await message.answer(
             text=text,
             reply_markup=keyboard,
-            parse_mode="HTML"
+            parse_mode=_HTML_PARSE
         )
 
-    async def show_ai_settings(self, target: Union[Message, CallbackQuery], edit_mode: bool = False) -> None:
-        """Универсальный метод для отображения настроек AI"""
-        user_id = target.from_user.id
-        text, keyboard = await self.ui.ai_settings_view(user_id, edit_mode)
-        
-        if isinstance(target, CallbackQuery):
-            try:
-                await target.message.edit_text(
-                    text=text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-            except Exception:
-                await self.bot.send_message(
-                    chat_id=target.message.chat.id,
-                    text=text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-        else:  # Это объект Message
-            await target.answer(
-                text=text,
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
+    async def show_general_settings(self, callback: CallbackQuery, edit_mode: bool = False) -> None:
+        """Отображает общие настройки, редактируя сообщение callback'а"""
+        text, keyboard = await self.ui.general_settings_view(callback.from_user.id, edit_mode)
+        await self._edit_screen(callback, text, keyboard)
 
-    async def show_general_settings(self, target: Union[Message, CallbackQuery], edit_mode: bool = False) -> None:
-        """Универсальный метод для отображения общих настроек"""
-        user_id = target.from_user.id
-        text, keyboard = await self.ui.general_settings_view(user_id, edit_mode)
-        
-        if isinstance(target, CallbackQuery):
-            await target.message.edit_text(text, reply_markup=keyboard)
-        else:  # Это объект Message
-            await target.answer(text, reply_markup=keyboard)
+    async def show_general_settings_msg(self, message: Message, edit_mode: bool = False) -> None:
+        """Отображает общие настройки ответом на текстовое сообщение"""
+        text, keyboard = await self.ui.general_settings_view(message.from_user.id, edit_mode)
+        await message.answer(
+            text=text,
+            reply_markup=keyboard,
+            parse_mode=_HTML_PARSE
+        )
     
     async def edit_general_settings(self, callback: CallbackQuery):
         """Вход в режим редактирования"""
         await self.ui.start_general_edit(callback.from_user.id)
         await self.show_general_settings(callback, edit_mode=True)
     
-    async def edit_general_param(self, callback: CallbackQuery):
+    async def edit_general_param(self, callback: CallbackQuery, param: str):
         """Обработка выбора параметра"""
-        param = callback.data.replace("edit_general_", "")
         keyboard = await self.ui.general_param_selector(callback.from_user.id, param)
         await callback.message.edit_text(f"Выберите значение для {param}:", reply_markup=keyboard)
     
-    async def set_general_param(self, callback: CallbackQuery) -> None:
-        """Обработчик установки значений для основных настроек"""
-        # Извлекаем данные после префикса "set_general_"
-        data_str = callback.data.replace("set_general_", "", 1)
+    async def set_general_param(self, callback: CallbackQuery, data_str: str) -> None:
+        """Обработчик установки значений для основных настроек (data_str - данные после "set_general_")"""
         user_id = callback.from_user.id
         
         # Обработка ручного ввода (кнопка "Вручную")
@@ -512,40 +1039,21 @@ class AsyncTelegramBot:
             param = data_str.replace("_custom", "")
             
             # Сохраняем информацию о параметре
-            self.pending_input[user_id] = {
-                'param': param,
-                'type': 'general',
-                'chat_id': callback.message.chat.id,
-            }
-            
-            # Устанавливаем таймаут 5 минут
-            self.pending_input_timeouts[user_id] = time.time() + 300
+            self._start_pending_input(user_id, param, 'general', callback.message.chat.id)
             
             # Отправляем запрос с примерами
-            examples = {
-                'temperature': "0.1-1.0 (например: 0.7)",
-                'max_tokens': "500-10000 (например: 2500)",
-                'check_interval': "60-86400 сек (например: 300 или 5m)",
-                'min_delay_between_posts': "10-3600 сек (например: 60)",
-                'posts_per_hour': "1-100 (например: 10)"
-            }.get(param, "числовое значение")
-            
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_edit_general")]
-                ]
-            ])
+            examples = _PARAM_EXAMPLES.get(param, "числовое значение")
             
             await callback.message.answer(
                 f"✏️ Введите новое значение для параметра '{param}':\n(Формат: {examples})",
-                reply_markup=keyboard
+                reply_markup=_cancel_keyboard("cancel_edit_general")
             )
             await callback.answer()
             return
         
         # Обработка предустановленных значений (обычный выбор)
         if ":" not in data_str:
-            logger.error(f"Invalid callback data format: {callback.data}")
+            logger.error("Invalid callback data format: %s", callback.data)
             await callback.answer("Ошибка формата данных")
             return
             
@@ -566,7 +1074,7 @@ class AsyncTelegramBot:
             await self.show_general_settings(callback, edit_mode=True)
             await callback.answer(f"✅ Значение обновлено: {value}")
         except ValueError:
-            logger.error(f"Invalid value for parameter {param}: {value_str}")
+            logger.error("Invalid value for parameter %s: %s", param, value_str)
             await callback.answer(f"❌ Недопустимое значение: {value_str}")
     
     async def save_general_settings(self, callback: CallbackQuery):
@@ -577,20 +1085,19 @@ class AsyncTelegramBot:
                 await callback.answer("Настройки не изменены")
                 return
             
-            # Применение изменений в конфигурации
-            for param, value in changes.items():
-                self.config.update_param(param, value)
+            # Применение изменений в конфигурации; перезапись .env не блокирует цикл событий
+            await asyncio.to_thread(self.config.update_params, changes)
             
             # Формирование отчета
             changes_text = "\n".join([f"• {param}: {value}" for param, value in changes.items()])
             text = f"✅ Основные настройки обновлены:\n\n{changes_text}"
             
+            await callback.answer()
             await callback.message.edit_text(text)
-            await asyncio.sleep(3)
-            await self.show_general_settings(callback)
+            self._schedule_reshow(callback, self.show_general_settings)
             
         except Exception as e:
-            logger.error(f"Ошибка сохранения: {str(e)}")
+            logger.error("Ошибка сохранения: %s", e)
             await callback.answer("Ошибка сохранения настроек", show_alert=True)
 
     async def show_publication_settings(
@@ -685,20 +1192,20 @@ class AsyncTelegramBot:
                 await target.message.edit_text(
                     text=settings_text,
                     reply_markup=keyboard,
-                    parse_mode="HTML"
+                    parse_mode=_HTML_PARSE
                 )
             except Exception:
                 await self.bot.send_message(
                     chat_id=target.message.chat.id,
                     text=settings_text,
                     reply_markup=keyboard,
-                    parse_mode="HTML"
+                    parse_mode=_HTML_PARSE
                 )
         else:
             await target.answer(
                 text=settings_text,
                 reply_markup=keyboard,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
     async def toggle_publication_mode(self, callback: CallbackQuery) -> None:
         """Переключает режим публикации между задержкой и расписанием"""
@@ -724,18 +1231,13 @@ class AsyncTelegramBot:
             await callback.answer(f"✅ Режим изменен на {new_mode}")
             await self.show_publication_settings(callback)
         except Exception as e:
-            logger.error(f"Ошибка изменения режима: {str(e)}")
+            logger.error("Ошибка изменения режима: %s", e)
             await callback.answer(f"❌ Ошибка: {str(e)}")
     
     async def handle_edit_schedule(self, callback: CallbackQuery) -> None:
         """Запрашивает ввод нового расписания"""
         user_id = callback.from_user.id
-        self.pending_input[user_id] = {
-            'param': 'publication_schedule',
-            'type': 'publication',
-            'chat_id': callback.message.chat.id,
-        }
-        self.pending_input_timeouts[user_id] = time.time() + 300
+        self._start_pending_input(user_id, 'publication_schedule', 'publication', callback.message.chat.id)
         
         current_schedule = ", ".join(
             [t.strftime("%H:%M") for t in self.controller.publication_schedule]
@@ -745,21 +1247,14 @@ class AsyncTelegramBot:
             f"✏️ Введите новое расписание (формат: ЧЧ:ММ, ЧЧ:ММ, ...)\n"
             f"Текущее расписание: {current_schedule}\n"
             "Пример: 9:30, 12:00, 18:45",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_edit_publication")
-            ]])
+            reply_markup=_cancel_keyboard("cancel_edit_publication")
         )
         await callback.answer()
 
     async def handle_edit_delay(self, callback: CallbackQuery) -> None:
         """Запрашивает ввод новой задержки"""
         user_id = callback.from_user.id
-        self.pending_input[user_id] = {
-            'param': 'min_delay_between_posts',
-            'type': 'publication',
-            'chat_id': callback.message.chat.id,
-        }
-        self.pending_input_timeouts[user_id] = time.time() + 300
+        self._start_pending_input(user_id, 'min_delay_between_posts', 'publication', callback.message.chat.id)
         
         current_delay = self.controller.min_delay if self.controller else ""
         
@@ -767,9 +1262,7 @@ class AsyncTelegramBot:
             f"✏️ Введите минимальную задержку между постами (в секундах)\n"
             f"Текущая задержка: {current_delay} сек\n"
             "Пример: 300 (или 5m)",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_edit_publication")
-            ]])
+            reply_markup=_cancel_keyboard("cancel_edit_publication")
         )
         await callback.answer()
 
@@ -783,55 +1276,45 @@ class AsyncTelegramBot:
                 await self.ui.cancel_general_edit(user_id)
             
             # Очищаем состояние ожидания ввода
-            if user_id in self.pending_input:
-                del self.pending_input[user_id]
-            if user_id in self.pending_input_timeouts:
-                del self.pending_input_timeouts[user_id]
-            if user_id in self.pending_input_retries:
-                del self.pending_input_retries[user_id]
+            self.pending_input.pop(user_id, None)
             
             # Возвращаемся в меню общих настроек
             await self.show_general_settings(callback)
             await callback.answer("❌ Редактирование отменено")
             
         except Exception as e:
-            logger.error(f"Ошибка отмены редактирования: {str(e)}", exc_info=True)
+            logger.error("Ошибка отмены редактирования: %s", e, exc_info=True)
             await callback.answer("⚠️ Ошибка отмены операции")
 
-    async def handle_cancel_edit(self, callback: CallbackQuery) -> None:
+    async def handle_cancel_edit(self, callback: CallbackQuery, _suffix: str = "") -> None:
         """Универсальная отмена редактирования для всех типов настроек"""
         try:
             user_id = callback.from_user.id
             
             # Удаляем состояние ожидания ввода
-            if user_id in self.pending_input:
-                input_data = self.pending_input[user_id]
-                del self.pending_input[user_id]
-                
+            input_data = self.pending_input.pop(user_id, None)
+            if input_data is not None:
                 # Определяем, куда вернуть пользователя после отмены
-                if input_data.get('type') == 'publication':
+                if input_data.type == 'publication':
                     # Возвращаем в меню публикации
                     await self.show_publication_settings(callback)
-                elif input_data.get('type') == 'ai':
+                elif input_data.type == 'ai':
                     # Возвращаем в настройки AI
                     await self.show_ai_settings(callback)
-                elif input_data.get('type') == 'general':
+                elif input_data.type == 'general':
                     # Возвращаем в общие настройки
                     await self.show_general_settings(callback)
+                elif input_data.type == 'rss':
+                    # Возвращаем в настройки RSS
+                    await self.show_rss_settings(callback)
                 else:
                     # Возвращаем в главное меню
                     await self.send_main_menu(user_id, callback.message.chat.id)
             
-            # Очищаем таймауты и счетчики попыток
-            if user_id in self.pending_input_timeouts:
-                del self.pending_input_timeouts[user_id]
-            if user_id in self.pending_input_retries:
-                del self.pending_input_retries[user_id]
-            
             await callback.answer("❌ Редактирование отменено")
             
         except Exception as e:
-            logger.error(f"Ошибка отмены редактирования: {str(e)}", exc_info=True)
+            logger.error("Ошибка отмены редактирования: %s", e, exc_info=True)
             await callback.answer("⚠️ Ошибка отмены операции")
 
     async def edit_ai_settings(self, callback: CallbackQuery) -> None:
@@ -840,9 +1323,8 @@ class AsyncTelegramBot:
         await self.show_ai_settings(callback, edit_mode=True)
         await callback.answer()
 
-    async def edit_ai_param(self, callback: CallbackQuery) -> None:
+    async def edit_ai_param(self, callback: CallbackQuery, param_type: str) -> None:
         """Обрабатывает выбор параметра для редактирования"""
-        param_type = callback.data.replace("edit_ai_", "")
         user_id = callback.from_user.id
         
         if param_type == "model":
@@ -862,20 +1344,19 @@ class AsyncTelegramBot:
             await callback.message.edit_text(
                 text=text,
                 reply_markup=keyboard,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
         except Exception:
             await self.bot.send_message(
                 chat_id=callback.message.chat.id,
                 text=text,
                 reply_markup=keyboard,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
         await callback.answer()
 
-    async def set_ai_model(self, callback: CallbackQuery) -> None:
+    async def set_ai_model(self, callback: CallbackQuery, model: str) -> None:
         """Устанавливает выбранную модель"""
-        model = callback.data.split(":")[1]
         await self.ui.update_ai_setting(callback.from_user.id, "model", model)
         await self.show_ai_settings(callback, edit_mode=True)
         await callback.answer(f"Модель изменена на {model}")
@@ -886,9 +1367,9 @@ class AsyncTelegramBot:
         await self.show_ai_settings(callback, edit_mode=True)
         await callback.answer("Состояние ИИ изменено")
 
-    async def set_ai_temp(self, callback: CallbackQuery) -> None:
+    async def set_ai_temp(self, callback: CallbackQuery, value: str) -> None:
         """Устанавливает температуру из предустановленных значений"""
-        temp = float(callback.data.split(":")[1])
+        temp = float(value)
         await self.ui.update_ai_setting(callback.from_user.id, "temperature", temp)
         await self.show_ai_settings(callback, edit_mode=True)
         await callback.answer(f"Температура изменена на {temp}")
@@ -897,28 +1378,17 @@ class AsyncTelegramBot:
         """Запрашивает ручной ввод температуры"""
         user_id = callback.from_user.id
         
-        self.pending_input[user_id] = {
-            'param': 'temperature',
-            'type': 'ai',
-            'chat_id': callback.message.chat.id,
-        }
-        self.pending_input_timeouts[user_id] = time.time() + 300
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-            [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_edit_ai")]
-            ]
-        ])
+        self._start_pending_input(user_id, 'temperature', 'ai', callback.message.chat.id)
         
         await callback.message.answer(
             "✏️ Введите значение температуры (0.1-1.0):\nПример: 0.7",
-            reply_markup=keyboard
+            reply_markup=_cancel_keyboard("cancel_edit_ai")
         )
         await callback.answer()
 
-    async def set_ai_tokens(self, callback: CallbackQuery) -> None:
+    async def set_ai_tokens(self, callback: CallbackQuery, value: str) -> None:
         """Устанавливает токены из предустановленных значений"""
-        tokens = int(callback.data.split(":")[1])
+        tokens = int(value)
         await self.ui.update_ai_setting(callback.from_user.id, "max_tokens", tokens)
         await self.show_ai_settings(callback, edit_mode=True)
         await callback.answer(f"Макс. токенов изменено на {tokens}")
@@ -927,22 +1397,11 @@ class AsyncTelegramBot:
         """Запрашивает ручной ввод количества токенов"""
         user_id = callback.from_user.id
         
-        self.pending_input[user_id] = {
-            'param': 'max_tokens',
-            'type': 'ai',
-            'chat_id': callback.message.chat.id,
-        }
-        self.pending_input_timeouts[user_id] = time.time() + 300
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-            [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_edit_ai")]
-            ]
-        ])
+        self._start_pending_input(user_id, 'max_tokens', 'ai', callback.message.chat.id)
         
         await callback.message.answer(
             "✏️ Введите максимальное количество токенов (500-10000):\nПример: 2500",
-            reply_markup=keyboard
+            reply_markup=_cancel_keyboard("cancel_edit_ai")
         )
         await callback.answer()
 
@@ -956,24 +1415,22 @@ class AsyncTelegramBot:
                 await self.show_ai_settings(callback)
                 return
             
-            # Применяем изменения в конфигурации
-            for param, value in changes.items():
-                self.config.update_param(param, value)
-                logger.info(f"Параметр {param} изменен на {value}")
+            # Применяем изменения в конфигурации; перезапись .env не блокирует цикл событий
+            await asyncio.to_thread(self.config.update_params, changes)
             
             # Формируем сообщение об изменениях
             changes_text = "\n".join([f"• {param}: {value}" for param, value in changes.items()])
             text = f"✅ Настройки успешно обновлены:\n\n{changes_text}"
             
+            await callback.answer()
             await callback.message.edit_text(
                 text=text,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
-            await asyncio.sleep(3)
-            await self.show_ai_settings(callback)
+            self._schedule_reshow(callback, self.show_ai_settings)
             
         except Exception as e:
-            logger.error(f"Ошибка сохранения настроек AI: {str(e)}")
+            logger.error("Ошибка сохранения настроек AI: %s", e)
             await callback.answer("Ошибка сохранения настроек", show_alert=True)
 
     async def cancel_ai_edit(self, callback: CallbackQuery) -> None:
@@ -983,41 +1440,47 @@ class AsyncTelegramBot:
         await callback.answer("Редактирование отменено")
 
     # RSS настройки
-    async def show_rss_settings(self, callback: CallbackQuery):
-        """Показывает настройки RSS"""
-        if not self.controller:
-            await callback.answer("Контроллер не подключен")
-            return
-            
-        feeds = self.controller.get_rss_status()
-        text, keyboard = await self.ui.rss_settings_view(feeds)
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    
+    def _rss_feeds(self) -> List[Dict]:
+        """Статус лент из контроллера с коротким TTL, чтобы серия нажатий не опрашивала его заново"""
+        now = time.monotonic()
+        if self._rss_cache is not None and now - self._rss_cache[0] < self.RSS_STATUS_TTL:
+            return self._rss_cache[1]
+        return self._remember_feeds(self.controller.get_rss_status())
+
+    def _remember_feeds(self, feeds: List[Dict]) -> List[Dict]:
+        self._rss_cache = (time.monotonic(), feeds)
+        return feeds
+
     async def start_rss_add(self, callback: CallbackQuery):
         """Начало добавления RSS"""
-        keyboard = await self.ui.rss_add_dialog()
+        # Следующее текстовое сообщение пользователя будет принято как URL (см. _process_text_message)
+        self._start_pending_input(callback.from_user.id, 'rss_url', 'rss', callback.message.chat.id)
         await callback.message.edit_text(
             "Введите URL новой RSS-ленты:",
-            reply_markup=keyboard
+            reply_markup=_cancel_keyboard("cancel_edit_rss")
         )
-        # Ожидание ввода реализуется в handle_message
     
     async def start_rss_remove(self, callback: CallbackQuery):
         """Начало удаления RSS"""
-        feeds = self.controller.get_rss_status()
+        feeds = self._rss_feeds()
         keyboard = await self.ui.rss_remove_selector(feeds)
         await callback.message.edit_text(
             "Выберите ленту для удаления:",
             reply_markup=keyboard
         )
     
-    async def confirm_rss_remove(self, callback: CallbackQuery):
+    async def confirm_rss_remove(self, callback: CallbackQuery, index_str: str):
         """Подтверждение удаления RSS"""
+        if not _RSS_REMOVE_RE.fullmatch(index_str):
+            logger.error("Ошибка парсинга: %s", callback.data)
+            await callback.answer("❌ Ошибка формата команды")
+            return
+        
         try:
-            index = int(callback.data.split("_")[-1])
+            index = int(index_str)
             
             # Валидация индекса
-            if index < 0 or index >= len(self.config.RSS_URLS):
+            if index >= len(self.config.RSS_URLS):
                 await callback.answer("❌ Неверный индекс ленты")
                 return
                 
@@ -1028,32 +1491,33 @@ class AsyncTelegramBot:
                 self.config.RSS_ACTIVE.pop(index)
             
             # Сохраняем изменения в контроллере и .env
+            feeds = None
             if self.controller:
-                self.controller.update_rss_state(
+                feeds = self._remember_feeds(self.controller.update_rss_state(
                     self.config.RSS_URLS,
                     self.config.RSS_ACTIVE
-                )
+                ))
             
             await callback.answer(f"✅ RSS удалена: {removed}")
-            await self.show_rss_settings(callback)  # Обновляем интерфейс
+            await self.show_rss_settings(callback, feeds=feeds)  # Обновляем интерфейс
         except (IndexError, ValueError) as e:
-            logger.error(f"Ошибка удаления RSS: {str(e)}")
+            logger.error("Ошибка удаления RSS: %s", e)
             await callback.answer("❌ Ошибка удаления ленты")
     
-    async def toggle_rss_feed(self, callback: CallbackQuery):
-        """Включение/выключение RSS-ленты"""
-        try:
-            # Извлечение индекса и действия
-            parts = callback.data.split("_")
-            index = int(parts[2])
-            action = parts[3]
-        except (IndexError, ValueError) as e:
-            logger.error(f"Ошибка парсинга: {callback.data} - {str(e)}")
+    async def toggle_rss_feed(self, callback: CallbackQuery, suffix: str):
+        """Включение/выключение RSS-ленты (suffix: "<индекс>_<enable|disable>")"""
+        # Извлечение индекса и действия
+        match = _RSS_TOGGLE_RE.fullmatch(suffix)
+        if not match:
+            logger.error("Ошибка парсинга: %s", callback.data)
             await callback.answer("❌ Ошибка формата команды")
             return
+        index = int(match.group(1))
+        action = match.group(2)
         
         # Логика активации/деактивации
         success = await self.controller.toggle_rss_feed(index, action == "enable")
+        self._rss_cache = None
         
         if success:
             status = "активирована" if action == "enable" else "деактивирована"
@@ -1071,15 +1535,15 @@ class AsyncTelegramBot:
         
         changed = await self.controller.refresh_rss_status()
         if changed:
+            self._rss_cache = None
             await callback.answer("Статус RSS обновлен")
             await self.show_rss_settings(callback)
         else:
             await callback.answer("Данные не изменились")
 
-    async def handle_retry_input(self, callback: CallbackQuery):
+    async def handle_retry_input(self, callback: CallbackQuery, param: str):
         """Повторный запрос ввода после ошибки"""
         user_id = callback.from_user.id
-        param = callback.data.replace("retry_", "")
         
         if user_id not in self.pending_input:
             await callback.answer("❌ Сессия ввода утеряна")
@@ -1088,31 +1552,112 @@ class AsyncTelegramBot:
         input_data = self.pending_input[user_id]
         
         await callback.message.answer(
-            f"✏️ Введите новое значение для '{param}':\n(Ошибка: {input_data.get('last_error', '')})",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="❌ Отмена", callback_data=f"cancel_edit_{input_data['type']}")]
-            ])
+            f"✏️ Введите новое значение для '{param}':\n(Ошибка: {input_data.last_error})",
+            reply_markup=_cancel_keyboard(f"cancel_edit_{input_data.type}")
         )
         await callback.answer()
 
     async def handle_message(self, message: Message) -> None:
-        """Обработчик текстовых сообщений с подтверждением изменений"""
+        """Точка входа текстовых сообщений: серия быстрых сообщений склеивается в одно"""
         if not await self.enforce_owner_access(message):
             return
-            
+
+        chat_id = message.chat.id
+        window = self.config.BOT_MSG_BATCH_MS / 1000
+        if (window <= 0 or not message.text or message.text.startswith('/')
+                or message.from_user.id in self.pending_input):
+            # Команды и ожидаемый ввод параметра не ждут окна и не склеиваются: ввод — это одно
+            # значение, и склейка превратила бы два URL или исправленное число в одну строку.
+            # Сначала отдаем накопленное, затем обрабатываем сразу
+            batch = self._take_message_batch(chat_id)
+            if batch is not None:
+                await self._process_text_message(batch)
+            await self._process_text_message(message)
+            return
+
+        self._msg_batch.setdefault(chat_id, []).append(message)
+        timer = self._msg_batch_timer.get(chat_id)
+        if timer is not None:
+            timer.cancel()
+        self._msg_batch_timer[chat_id] = asyncio.get_running_loop().call_later(
+            window, self._schedule_batch_flush, chat_id
+        )
+
+    def _take_message_batch(self, chat_id: int) -> Optional[Message]:
+        """Забирает накопленные сообщения чата, объединяя тексты через перевод строки"""
+        timer = self._msg_batch_timer.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        messages = self._msg_batch.pop(chat_id, None)
+        if not messages:
+            return None
+        if len(messages) == 1:
+            return messages[0]
+        return messages[-1].model_copy(update={'text': "\n".join(m.text for m in messages)})
+
+    def _schedule_batch_flush(self, chat_id: int) -> None:
+        task = asyncio.create_task(self._flush_message_batch(chat_id))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    def _schedule_reshow(self, callback: CallbackQuery, show: Callable, delay: float = 3.0) -> None:
+        """Возвращает экран настроек после показа отчета о сохранении, не блокируя обработку чата.
+        Повторное сохранение до перерисовки отменяет предыдущую: экран рисуется один раз."""
+        user_id = callback.from_user.id
+        self._cancel_reshow(user_id)
+        task = asyncio.create_task(self._delayed_reshow(callback, show, delay))
+        self._reshow_tasks[user_id] = task
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+        task.add_done_callback(
+            lambda t: self._reshow_tasks.pop(user_id, None) if self._reshow_tasks.get(user_id) is t else None
+        )
+
+    def _cancel_reshow(self, user_id: int) -> None:
+        """Отменяет запланированную перерисовку: пользователь уже перешел на другой экран"""
+        previous = self._reshow_tasks.pop(user_id, None)
+        if previous is not None:
+            previous.cancel()
+
+    async def _delayed_reshow(self, callback: CallbackQuery, show: Callable, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            async with self._chat_lock(callback.message.chat.id):
+                await show(callback)
+        except Exception as e:
+            logger.error("Ошибка отложенного обновления экрана: %s", e)
+
+    async def _flush_message_batch(self, chat_id: int) -> None:
+        """Обрабатывает склеенную серию сообщений с соблюдением порядка событий чата"""
+        async with self._chat_lock(chat_id):
+            batch = self._take_message_batch(chat_id)
+            if batch is None:
+                return
+            try:
+                await self._process_text_message(batch)
+            except Exception as e:
+                logger.error("Ошибка обработки сообщений чата %s: %s", chat_id, e, exc_info=True)
+
+    async def _process_text_message(self, message: Message) -> None:
+        """Обработчик текстовых сообщений с подтверждением изменений"""
         user_id = message.from_user.id
         text = message.text.strip()
         
         # Обработка ожидаемых вводов параметров
         if user_id in self.pending_input:
             input_data = self.pending_input[user_id]
-            param = input_data['param']
-            param_type = input_data.get('type', 'general')
+            param = input_data.param
+            param_type = input_data.type
             
             try:
                     # Удаляем ожидание ввода сразу (чтобы избежать рекурсии)
                     del self.pending_input[user_id]
                     
+                    # Добавление RSS-ленты (ввод URL после кнопки "Добавить")
+                    if param_type == 'rss':
+                        await self._add_rss_feed(message, text)
+                        return
+                    
                     # Обработка параметров публикации
                     if param_type == 'publication':
                         if param == 'publication_schedule':
@@ -1138,9 +1683,6 @@ class AsyncTelegramBot:
                             await message.answer(f"✅ Задержка обновлена: {value} сек")
                             await self.show_publication_settings(message)
                             
-                        # Сброс счетчика попыток
-                        if user_id in self.pending_input_retries:
-                            del self.pending_input_retries[user_id]
                         return
                     
                     # Обработка параметров AI
@@ -1149,157 +1691,108 @@ class AsyncTelegramBot:
                             value = self.validator.validate_temperature(text)
                             await self.ui.update_ai_setting(user_id, "temperature", value)
                             await message.answer(f"✅ Установлено: {param} = {value}")
-                            await self.show_ai_settings(message, edit_mode=True)
+                            await self.show_ai_settings_msg(message, edit_mode=True)
                             
                         elif param == 'max_tokens':
                             value = self.validator.validate_tokens(text)
                             await self.ui.update_ai_setting(user_id, "max_tokens", value)
                             await message.answer(f"✅ Установлено: {param} = {value}")
-                            await self.show_ai_settings(message, edit_mode=True)
+                            await self.show_ai_settings_msg(message, edit_mode=True)
                             
-                        # Сброс счетчика попыток
-                        if user_id in self.pending_input_retries:
-                            del self.pending_input_retries[user_id]
                         return
                     
                     # Обработка общих параметров
                     elif param_type == 'general':
-                        if param in ['temperature', 'yagpt_temperature']:
-                            value = self.validator.validate_temperature(text)
-                        elif param in ['max_tokens', 'yagpt_max_tokens']:
-                            value = self.validator.validate_tokens(text)
-                        elif param in ['check_interval', 'min_delay_between_posts']:
-                            value = self.validator.validate_interval(text)
-                        elif param in ['enable_yagpt', 'image_fallback']:
-                            value = self.validator.validate_boolean(text)
+                        validate = _GENERAL_VALIDATORS.get(param)
+                        if validate is not None:
+                            value = validate(text)
                         else:
                             # Общая валидация для числовых параметров
-                            min_val, max_val = 1, 10000
-                            value = self.validator.validate_integer(text, min_val, max_val)
+                            value = self.validator.validate_integer(text, 1, 10000)
                         
                         # Обновление параметра
-                        if param_type == 'ai':
-                            await self.ui.update_ai_setting(user_id, param, value)
-                            await self.show_ai_settings(message, edit_mode=True)
-                        elif param_type == 'general':
-                            await self.ui.update_general_setting(user_id, param, value)
-                            await self.show_general_settings(message, edit_mode=True)
+                        await self.ui.update_general_setting(user_id, param, value)
+                        await self.show_general_settings_msg(message, edit_mode=True)
                             
                         await message.answer(f"✅ Установлено: {param} = {value}")
                         
-                        # Сброс счетчика попыток
-                        if user_id in self.pending_input_retries:
-                            del self.pending_input_retries[user_id]
-                        
             except ValueError as e:
                     # Сохраняем контекст для повторной попытки
-                    input_data['last_error'] = str(e)
-                    self.pending_input[user_id] = input_data
+                    input_data.last_error = str(e)
                     
                     # Счетчик попыток
-                    retries = self.pending_input_retries.get(user_id, 0) + 1
-                    self.pending_input_retries[user_id] = retries
-                    
-                    if retries >= 3:
+                    input_data.retries += 1
+                    if input_data.retries >= 3:
                         await message.answer(f"❌ Слишком много ошибок. Операция отменена.\nОшибка: {str(e)}")
-                        del self.pending_input[user_id]
-                        del self.pending_input_retries[user_id]
                         return
-                        
-                    # Клавиатура с кнопкой отмены
-                    cancel_data = f"cancel_edit_{param_type}"
-                    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                        [
-                            InlineKeyboardButton(text="↩️ Повторить ввод", callback_data=f"retry_{param}"),
-                            InlineKeyboardButton(text="❌ Отмена", callback_data=cancel_data)
-                        ]
-                    ])
                     
+                    self.pending_input[user_id] = input_data
+                        
                     await message.answer(
                         f"❌ Ошибка: {str(e)}\n\nПопробуйте еще раз:",
-                        reply_markup=keyboard
+                        reply_markup=_retry_keyboard(param, param_type)
                     )
                     return
                     
             except Exception as e:
-                    logger.error(f"Ошибка обработки ввода: {str(e)}")
+                    logger.error("Ошибка обработки ввода: %s", e)
                     await message.answer("❌ Произошла ошибка при обработке значения")
                     return
             
-            # Обработка добавления RSS
-            if message.reply_to_message and ("rss" in message.reply_to_message.text.lower() or "лент" in message.reply_to_message.text.lower()):
-                url = text
-                if not url.startswith(('http://', 'https://')):
-                    await message.answer("❌ Некорректный URL. Должен начинаться с http:// или https://")
-                    return
-                    
-                if url in self.config.RSS_URLS:
-                    await message.answer("⚠️ Эта RSS-лента уже есть в списке")
-                    return
-                    
-                try:
-                    self.config.RSS_URLS.append(url)
-                    self.config.RSS_ACTIVE.append(True)
-                    self.config.save_to_env_file("RSS_URLS", json.dumps(self.config.RSS_URLS))
-                    self.config.save_to_env_file("RSS_ACTIVE", json.dumps(self.config.RSS_ACTIVE))
-                    
-                    if self.controller:
-                        self.controller.update_rss_state(self.config.RSS_URLS, self.config.RSS_ACTIVE)
-                    
-                    await message.answer(f"✅ RSS-лента успешно добавлена:\n{url}")
-                    
-                    # Показываем обновленный список
-                    if self.controller:
-                        feeds = self.controller.get_rss_status()
-                        text, keyboard = await self.ui.rss_settings_view(feeds)
-                        await message.answer("📋 Обновленный список RSS-лент:", reply_markup=keyboard)
-                except Exception as e:
-                    logger.error(f"Ошибка добавления RSS: {str(e)}")
-                    await message.answer(f"❌ Ошибка при добавлении RSS-ленты:\n{str(e)}")
-                return
-            
             # Если сообщение не распознано как ввод параметра
             await self.send_main_menu(user_id, message.chat.id)
         
-    async def show_rss_settings(self, callback: CallbackQuery, edit_mode: bool = False):
-        """Показывает настройки RSS с возможностью редактирования"""
+    async def _add_rss_feed(self, message: Message, url: str) -> None:
+        """Добавляет RSS-ленту из ручного ввода; ValueError уходит в общий механизм повтора ввода"""
+        if not url.startswith(('http://', 'https://')):
+            raise ValueError("Некорректный URL. Должен начинаться с http:// или https://")
+        if any(ch.isspace() for ch in url):
+            raise ValueError("URL не должен содержать пробелов и переводов строки")
+        if url in self.config.RSS_URLS:
+            raise ValueError("Эта RSS-лента уже есть в списке")
+            
+        try:
+            self.config.RSS_URLS.append(url)
+            self.config.RSS_ACTIVE.append(True)
+            
+            # Одна перезапись .env на оба ключа (контроллер сохраняет сам)
+            feeds = None
+            if self.controller:
+                feeds = self._remember_feeds(
+                    self.controller.update_rss_state(self.config.RSS_URLS, self.config.RSS_ACTIVE)
+                )
+            else:
+                self.config.save_rss_settings(self.config.RSS_URLS, self.config.RSS_ACTIVE)
+            
+            await message.answer(f"✅ RSS-лента успешно добавлена:\n{url}")
+            
+            # Показываем обновленный список
+            if feeds is not None:
+                _, keyboard = await self.ui.rss_settings_view(feeds)
+                await message.answer("📋 Обновленный список RSS-лент:", reply_markup=keyboard)
+        except Exception as e:
+            logger.error("Ошибка добавления RSS: %s", e)
+            await message.answer(f"❌ Ошибка при добавлении RSS-ленты:\n{str(e)}")
+
+    async def show_rss_settings(self, callback: CallbackQuery, edit_mode: bool = False,
+                                feeds: Optional[List[Dict]] = None):
+        """Показывает настройки RSS с возможностью редактирования (feeds — уже полученный статус лент)"""
         if not self.controller:
             await callback.answer("Контроллер не подключен")
             return
             
-        feeds = self.controller.get_rss_status()
+        if feeds is None:
+            feeds = self._rss_feeds()
         text, keyboard = await self.ui.rss_settings_view(feeds, edit_mode)
-        
-        try:
-            await callback.message.edit_text(
-                text=text,
-                reply_markup=keyboard
-            )
-        except TelegramBadRequest as e:
-            if "message is not modified" in str(e):
-                logger.debug("Skipping unchanged RSS status")
-            else:
-                raise
-        except Exception:
-            await self.bot.send_message(
-                chat_id=callback.message.chat.id,
-                text=text,
-                reply_markup=keyboard
-            )
+        await self._edit_screen(callback, text, keyboard, parse_mode=None)
 
     async def show_notify_settings(self, callback: CallbackQuery) -> None:
         """Показывает настройки уведомлений"""
-        text = (
-            "🔔 <b>Настройки уведомлений</b>\n\n"
-            "Здесь будут настройки уведомлений\n"
-            "Функция в разработке"
-        )
-        
         keyboard = await self.ui.back_to_settings()
         await callback.message.edit_text(
-            text=text,
+            text=_NOTIFY_SETTINGS_TEXT,
             reply_markup=keyboard,
-            parse_mode="HTML"
+            parse_mode=_HTML_PARSE
         )
     
     async def handle_start(self, message: Message) -> None:
@@ -1315,9 +1808,9 @@ class AsyncTelegramBot:
         
         await self.bot.send_message(
             chat_id=chat_id,
-            text="🤖 <b>Управление RSS Ботом</b>\n\nВыберите действие:",
+            text=_MAIN_MENU_TEXT,
             reply_markup=keyboard,
-            parse_mode="HTML"
+            parse_mode=_HTML_PARSE
         )
     
     async def show_statistics(self, callback: CallbackQuery) -> None:
@@ -1327,39 +1820,26 @@ class AsyncTelegramBot:
             return
             
         stats = self.controller.stats
-        text, media = await self.ui.stats_visualization(stats)
+        text, media = await self.ui.stats_visualization(stats, self.controller.hourly_stats)
         
         if media:
             await self.bot.send_photo(
                 chat_id=callback.message.chat.id,
                 photo=media.media,
                 caption=text,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
         else:
             await self.bot.send_message(
                 chat_id=callback.message.chat.id,
                 text=text,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
     
     async def show_settings_menu(self, callback: CallbackQuery) -> None:
         """Показывает меню настроек"""
         keyboard = await self.ui.settings_menu(callback.from_user.id)
-        
-        try:
-            await callback.message.edit_text(
-                "⚙️ <b>Настройки бота</b>\n\nВыберите категорию:",
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
-        except Exception:
-            await self.bot.send_message(
-                chat_id=callback.message.chat.id,
-                text="⚙️ <b>Настройки бота</b>\n\nВыберите категорию:",
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
+        await self._edit_screen(callback, _SETTINGS_MENU_TEXT, keyboard)
     
     async def show_image_settings(self, callback: CallbackQuery) -> None:
         """Показывает настройки изображений"""
@@ -1370,32 +1850,19 @@ class AsyncTelegramBot:
                 chat_id=callback.message.chat.id,
                 photo=media.media,
                 caption=text,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
         else:
             await self.bot.send_message(
                 chat_id=callback.message.chat.id,
                 text=text,
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
     
     async def show_theme_selector(self, callback: CallbackQuery) -> None:
         """Показывает выбор тем оформления"""
         keyboard = await self.ui.theme_selector(callback.from_user.id)
-        
-        try:
-            await callback.message.edit_text(
-                "🎨 <b>Выбор темы оформления</b>\n\nВыберите стиль интерфейса:",
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
-        except Exception:
-            await self.bot.send_message(
-                chat_id=callback.message.chat.id,
-                text="🎨 <b>Выбор темы оформления</b>\n\nВыберите стиль интерфейса:",
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
+        await self._edit_screen(callback, _THEME_SELECTOR_TEXT, keyboard)
     
     async def handle_start_bot(self, callback: CallbackQuery) -> None:
         """Обработка запуска бота"""
@@ -1403,11 +1870,12 @@ class AsyncTelegramBot:
             await callback.answer("Контроллер не подключен")
             return
             
-        await self.ui.animated_processing(callback.message, "Запуск бота")
+        if self.controller.is_running:
+            await callback.answer("Бот уже запущен")
+            return
         
-        if not self.controller.is_running:
-            await self.controller.start()
-            await callback.answer("✅ Бот успешно запущен")
+        await self.ui.animated_processing(callback.message, "Запуск бота", self.controller.start())
+        await callback.answer("✅ Бот успешно запущен")
     
     async def handle_stop_bot(self, callback: CallbackQuery) -> None:
         """Обработка остановки бота"""
@@ -1415,41 +1883,38 @@ class AsyncTelegramBot:
             await callback.answer("Контроллер не подключен")
             return
             
-        await self.ui.animated_processing(callback.message, "Остановка бота")
+        if not self.controller.is_running:
+            await callback.answer("Бот уже остановлен")
+            return
         
-        if self.controller.is_running:
-            await self.controller.stop()
-            await callback.answer("⏸ Бот остановлен")
+        await self.ui.animated_processing(callback.message, "Остановка бота", self.controller.stop())
+        await callback.answer("⏸ Бот остановлен")
 
     async def handle_status(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
         if not self.controller:
             await message.answer("⚠️ Контроллер не подключен")
             return
             
         status = self.controller.get_status_text()
-        await message.answer(status, parse_mode="HTML")
+        await message.answer(status, parse_mode=_HTML_PARSE)
 
     async def handle_stats(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
-        if not self.controller or not hasattr(self.controller, 'stats'):
+        controller = self.controller
+        if controller is None or (controller_stats := getattr(controller, 'stats', None)) is None:
             await message.answer("⚠️ Статистика недоступна")
             return
             
-        stats = (
-            "📊 <b>Статистика:</b>\n"
-            f"Постов: {self.controller.stats.get('posts_sent', 0)}\n"
-            f"Ошибок: {self.controller.stats.get('errors', 0)}\n"
-            f"Изображений: {self.controller.stats.get('images_generated', 0)}\n"
-            f"Дубликатов отклонено: {self.controller.stats.get('duplicates_rejected', 0)}\n"
-            f"Использований YandexGPT: {self.controller.stats.get('yagpt_used', 0)}\n"
-            f"Ошибок YandexGPT: {self.controller.stats.get('yagpt_errors', 0)}"
-        )
-        await message.answer(stats, parse_mode="HTML")
+        stats = _STATS_TEMPLATE.format_map(ChainMap(controller_stats, _STATS_DEFAULTS))
+        await message.answer(stats, parse_mode=_HTML_PARSE)
+
+    @staticmethod
+    def _format_feed_line(index: int, feed: Dict[str, Any]) -> str:
+        """Строка списка /rss_list для одной ленты"""
+        status_icon = '🟢' if feed.get('active', True) else '🔴'
+        error_count = feed.get('error_count', 0)
+        error_icon = f" | ❗️ {error_count}" if error_count > 0 else ""
+        last_check = f" | 📅 {feed['last_check']}" if feed.get('last_check') else ""
+        return f"{index}. {status_icon} {feed['url'][:50]}...{error_icon}{last_check}"
 
     async def handle_rss_list(self, message: Message) -> None:  # Изменён тип параметра
         """Отправляет список RSS-лент"""
@@ -1461,52 +1926,43 @@ class AsyncTelegramBot:
                 await message.answer("⚠️ Контроллер не подключен")
                 return
                 
-            feeds = self.controller.get_rss_status()
-            lines = ["📡 <b>Статус RSS-лент</b>\n"]
-            
-            for i, feed in enumerate(feeds, 1):
-                status_icon = '🟢' if feed.get('active', True) else '🔴'
-                error_icon = f" | ❗️ {feed.get('error_count', 0)}" if feed.get('error_count', 0) > 0 else ""
-                last_check = f" | 📅 {feed.get('last_check', 'никогда')}" if feed.get('last_check') else ""
-                lines.append(f"{i}. {status_icon} {feed['url'][:50]}...{error_icon}{last_check}")
-            
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                [InlineKeyboardButton(text="◀️ Назад в меню", callback_data="main_menu")]
-                ]
-            ])
+            feeds = self._rss_feeds()
+            body = "\n".join(
+                self._format_feed_line(i, feed) for i, feed in enumerate(feeds, 1)
+            )
             
             await message.answer(  # Используем message вместо callback
-                text="\n".join(lines),
-                reply_markup=keyboard,
-                parse_mode="HTML"
+                text=f"{_RSS_LIST_HEADER}{body}",
+                reply_markup=_BACK_TO_MAIN_KEYBOARD,
+                parse_mode=_HTML_PARSE
             )
         except Exception as e:
-            logger.error(f"Error showing RSS list: {str(e)}")
+            logger.error("Error showing RSS list: %s", e)
             await message.answer("Ошибка получения списка лент")
             
     async def enforce_owner_access(self, message_or_callback: Union[Message, CallbackQuery]) -> bool:
         """Проверяет доступ и уведомляет о попытках несанкционированного доступа"""
         user_id = message_or_callback.from_user.id
-        if user_id == self.config.OWNER_ID:
+        if user_id == self._owner_id:
             return True
             
         # Логирование и уведомление
         username = f"@{message_or_callback.from_user.username}" if message_or_callback.from_user.username else "без username"
-        logger.warning(f"Unauthorized access attempt: UserID={user_id} {username}")
-        
-        # Отправка предупреждения владельцу
-        try:
-            await self.bot.send_message(
-                chat_id=self.config.OWNER_ID,
-                text=f"⚠️ *Попытка доступа!*\n"
-                    f"• Пользователь: {username}\n"
-                    f"• ID: `{user_id}`\n"
-                    f"• Команда: `{getattr(message_or_callback, 'text', message_or_callback.data)}`",
-                parse_mode="Markdown"
-            )
-        except Exception as e:
-            logger.error(f"Failed to send owner alert: {e}")
+        logger.warning("Unauthorized access attempt: UserID=%s %s", user_id, username)
+        
+        # Предупреждение владельцу отправляется в фоне и не чаще раза в минуту на пользователя
+        now = time.monotonic()
+        if now - self._intrusion_alerts.get(user_id, float('-inf')) >= self.INTRUSION_ALERT_INTERVAL:
+            self._intrusion_alerts[user_id] = now
+            if len(self._intrusion_alerts) > 1024:
+                self._intrusion_alerts = {
+                    uid: ts for uid, ts in self._intrusion_alerts.items()
+                    if now - ts < self.INTRUSION_ALERT_INTERVAL
+                }
+            command = getattr(message_or_callback, 'text', None) or getattr(message_or_callback, 'data', None)
+            task = asyncio.create_task(self._notify_intrusion(username, user_id, command))
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
         
         # Ответ нарушителю
         try:
@@ -1519,19 +1975,41 @@ class AsyncTelegramBot:
         
         return False
     
-    async def is_owner(self, message: Message) -> bool:
-        return message.from_user.id == self.config.OWNER_ID
+    async def _notify_intrusion(self, username: str, user_id: int, command: Optional[str]) -> None:
+        """Отправка предупреждения владельцу о попытке доступа"""
+        try:
+            await self.bot.send_message(
+                chat_id=self.config.OWNER_ID,
+                text=f"⚠️ *Попытка доступа!*\n"
+                    f"• Пользователь: {username}\n"
+                    f"• ID: `{user_id}`\n"
+                    f"• Команда: `{command}`",
+                parse_mode="Markdown"
+            )
+        except Exception as e:
+            logger.error("Failed to send owner alert: %s", e)
 
-    async def handle_rss_add(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
-        args = message.text.split()
-        if len(args) < 2:
+    def _sync_owner_id(self) -> None:
+        """Приводит OWNER_ID к int один раз, чтобы сравнение с from_user.id было int-int"""
+        try:
+            self._owner_id = int(self.config.OWNER_ID)
+        except (TypeError, ValueError):
+            logger.error("Некорректный OWNER_ID: %r", self.config.OWNER_ID)
+            self._owner_id = -1
+        self._owner_filter.owner_id = self._owner_id
+
+    def is_owner(self, message: Message) -> bool:
+        """Синхронная проверка владельца (без создания корутины)"""
+        user = message.from_user
+        return user is not None and user.id == self._owner_id
+
+    async def handle_rss_add(self, message: Message, command: CommandObject) -> None:
+        parts = (command.args or "").split(maxsplit=1)
+        new_url = parts[0] if parts else ""
+        if not new_url:
             await message.answer("❌ Укажите URL RSS-ленты")
             return
         
-        new_url = args[1]
         if new_url in self.config.RSS_URLS:
             await message.answer("⚠️ Эта RSS-лента уже есть в списке")
             return
@@ -1540,17 +2018,15 @@ class AsyncTelegramBot:
         self.config.RSS_ACTIVE.append(True)  # Добавляем как активную
         await message.answer(f"✅ RSS-лента добавлена: {new_url}")
 
-    async def handle_rss_remove(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
-        args = message.text.split()
-        if len(args) < 2:
+    async def handle_rss_remove(self, message: Message, command: CommandObject) -> None:
+        parts = (command.args or "").split(maxsplit=1)
+        index_str = parts[0] if parts else ""
+        if not index_str:
             await message.answer("❌ Укажите номер RSS-ленты для удаления")
             return
         
         try:
-            index = int(args[1]) - 1
+            index = int(index_str) - 1
             if 0 <= index < len(self.config.RSS_URLS):
                 removed = self.config.RSS_URLS.pop(index)
                 
@@ -1564,9 +2040,6 @@ class AsyncTelegramBot:
             await message.answer("❌ Укажите корректный номер")
 
     async def handle_pause(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
         if not self.controller:
             await message.answer("⚠️ Контроллер не подключен")
             return
@@ -1578,9 +2051,6 @@ class AsyncTelegramBot:
             await message.answer("ℹ️ Бот уже остановлен")
 
     async def handle_resume(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
         if not self.controller:
             await message.answer("⚠️ Контроллер не подключен")
             return
@@ -1592,71 +2062,48 @@ class AsyncTelegramBot:
             await message.answer("ℹ️ Бот уже работает")
 
     async def handle_settings(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
-        source_mapping = {
-            'template': 'Шаблоны',
-            'original': 'Оригиналы',
-            'none': 'Нет'
-        }
-        
-        settings = (
-            "⚙️ <b>Текущие настройки:</b>\n"
-            f"YandexGPT: {'🟢 Вкл' if self.config.ENABLE_YAGPT else '🔴 Выкл'}\n"
-            f"Изображения: {'🟢 Вкл' if self.config.ENABLE_IMAGE_GENERATION else '🔴 Выкл'}\n"
-            f"Источник изображений: {source_mapping.get(self.config.IMAGE_SOURCE, 'Неизвестно')}\n"
-            f"Резервная генерация: {'🟢 Вкл' if self.config.IMAGE_FALLBACK else '🔴 Выкл'}\n"
-            f"Постов/час: {self.config.POSTS_PER_HOUR}\n"
-            f"Модель YandexGPT: {self.config.YAGPT_MODEL}"
-        )
-        await message.answer(settings, parse_mode="HTML")
-
-    async def handle_set(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
-        args = message.text.split()
-        if len(args) < 3:
+        config = self.config
+        settings = _SETTINGS_TEMPLATE.format_map({
+            'yagpt': _ON_OFF[bool(config.ENABLE_YAGPT)],
+            'images': _ON_OFF[bool(config.ENABLE_IMAGE_GENERATION)],
+            'source': _SOURCE_MAPPING.get(config.IMAGE_SOURCE, 'Неизвестно'),
+            'fallback': _ON_OFF[bool(config.IMAGE_FALLBACK)],
+            'posts_per_hour': config.POSTS_PER_HOUR,
+            'model': config.YAGPT_MODEL,
+        })
+        await message.answer(settings, parse_mode=_HTML_PARSE)
+
+    async def handle_set(self, message: Message, command: CommandObject) -> None:
+        # Аргументы уже разобраны фильтром Command: "<параметр> <значение>"
+        parts = (command.args or "").split(maxsplit=1)
+        if len(parts) < 2:
             await message.answer("❌ Используйте: /set [параметр] [значение]")
             return
+        head, value = parts[0], parts[1].strip()
         
-        param = args[1].upper()
-        value = " ".join(args[2:])
-        
-        ALLOWED_PARAMS = {
-            'POSTS_PER_HOUR': {'type': int, 'validator': lambda x: 1 <= x <= 60, 'error_msg': 'Должно быть целое число от 1 до 60'},
-            'MIN_DELAY_BETWEEN_POSTS': {'type': int, 'validator': lambda x: x >= 10, 'error_msg': 'Минимальная задержка 10 секунд'},
-            'CHECK_INTERVAL': {'type': int, 'validator': lambda x: x >= 60, 'error_msg': 'Интервал проверки не менее 60 секунд'},
-            'ENABLE_IMAGE_GENERATION': {'type': bool, 'validator': None},
-            'ENABLE_YAGPT': {'type': bool, 'validator': None},
-            'YAGPT_MODEL': {'type': str, 'validator': lambda x: x in ['yandexgpt-lite', 'yandexgpt-pro'], 'error_msg': 'Допустимые модели: yandexgpt-lite, yandexgpt-pro'},
-            'YAGPT_TEMPERATURE': {'type': float, 'validator': lambda x: 0.1 <= x <= 1.0, 'error_msg': 'Температура должна быть от 0.1 до 1.0'}
-        }
+        param = head.upper()
         
-        if param not in ALLOWED_PARAMS:
+        param_info = _SET_ALLOWED_PARAMS.get(param)
+        if param_info is None:
             await message.answer(f"❌ Параметр {param} недоступен для изменения")
             return
         
-        param_info = ALLOWED_PARAMS[param]
-        param_type = param_info['type']
         
         try:
-            if param_type is bool:
-                converted_value = value.lower() in ['true', '1', 'yes', 'on']
-            else:
-                converted_value = param_type(value)
+            # Тот же словарь преобразователей, что и в /set_all: один поиск вместо цепочки проверок типа
+            converted_value = _CONVERTERS[param_info['type']](value)
             
             if param_info['validator'] and not param_info['validator'](converted_value):
                 raise ValueError(param_info['error_msg'])
             
             setattr(self.config, param, converted_value)
             await message.answer(f"✅ Параметр {param} обновлен на {value}")
-            self.config.save_to_env_file(param, str(converted_value))
+            # Запись на диск не должна блокировать цикл событий
+            await asyncio.to_thread(self.config.save_to_env_file, param, str(converted_value))
         except (TypeError, ValueError) as e:
             await message.answer(f"❌ Ошибка: {str(e)}")
 
-    async def handle_set_schedule(self, message: Message) -> None:
+    async def handle_set_schedule(self, message: Message, command: CommandObject) -> None:
         """Обработчик команды /set_schedule"""
         # Проверка прав доступа
         if not await self.enforce_owner_access(message):
@@ -1667,8 +2114,8 @@ class AsyncTelegramBot:
             await message.answer("❌ Контроллер не инициализирован")
             return
             
-        args = message.text.split(maxsplit=1)
-        schedule_str = args[1].strip() if len(args) > 1 else None
+        # Аргументы уже отделены от команды фильтром Command
+        schedule_str = (command.args or "").strip() or None
 
         try:
             # Если аргументы не предоставлены, показываем текущие настройки
@@ -1724,7 +2171,7 @@ class AsyncTelegramBot:
             
         except Exception as e:
             error_msg = str(e)
-            logger.error(f"Ошибка установки расписания: {error_msg}")
+            logger.error("Ошибка установки расписания: %s", error_msg)
             await message.answer(error_msg)
 
     async def show_publication_settings_menu(self, callback: CallbackQuery) -> None:
@@ -1762,10 +2209,10 @@ class AsyncTelegramBot:
             await callback.message.edit_text(
                 text=text,
                 reply_markup=builder.as_markup(),
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
         except Exception as e:
-            logger.error(f"Ошибка показа меню публикации: {str(e)}")
+            logger.error("Ошибка показа меню публикации: %s", e)
             await callback.answer("Ошибка обновления меню")
         
     async def handle_show_schedule(self, callback: CallbackQuery) -> None:
@@ -1793,26 +2240,19 @@ class AsyncTelegramBot:
         await callback.message.edit_text(
             text=text,
             reply_markup=builder.as_markup(),
-            parse_mode="HTML"
+            parse_mode=_HTML_PARSE
         )
 
     async def handle_edit_schedule(self, callback: CallbackQuery) -> None:
         """Запрашивает ввод нового расписания через UI"""
         user_id = callback.from_user.id
-        self.pending_input[user_id] = {
-            'param': 'publication_schedule',
-            'type': 'publication',
-            'chat_id': callback.message.chat.id,
-        }
-        self.pending_input_timeouts[user_id] = time.time() + 300
+        self._start_pending_input(user_id, 'publication_schedule', 'publication', callback.message.chat.id)
         
         current_schedule = ", ".join(
             [t.strftime("%H:%M") for t in self.controller.publication_schedule]
         ) if self.controller else ""
         
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-            InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_edit_publication")
-        ]])
+        keyboard = _cancel_keyboard("cancel_edit_publication")
         
         text = (
             "✏️ <b>Введите новое расписание публикаций</b>\n\n"
@@ -1825,7 +2265,7 @@ class AsyncTelegramBot:
         await callback.message.answer(
             text=text,
             reply_markup=keyboard,
-            parse_mode="HTML"
+            parse_mode=_HTML_PARSE
         )
         await callback.answer()
 
@@ -1853,7 +2293,7 @@ class AsyncTelegramBot:
         await callback.message.edit_text(
             text=text,
             reply_markup=builder.as_markup(),
-            parse_mode="HTML"
+            parse_mode=_HTML_PARSE
         )
 
     async def handle_set_publication_mode(self, callback: CallbackQuery) -> None:
@@ -1873,7 +2313,7 @@ class AsyncTelegramBot:
             await callback.answer(f"✅ Режим изменен на {mode}")
             await self.show_publication_settings_menu(callback)
         except Exception as e:
-            logger.error(f"Ошибка смены режима: {str(e)}")
+            logger.error("Ошибка смены режима: %s", e)
             await callback.answer(f"❌ Ошибка: {str(e)}")
 
     async def handle_manage_schedule(self, callback: CallbackQuery) -> None:
@@ -1897,10 +2337,10 @@ class AsyncTelegramBot:
             await callback.message.edit_text(
                 "📅 <b>Управление расписанием публикаций</b>\n\nВыберите действие:",
                 reply_markup=builder.as_markup(),
-                parse_mode="HTML"
+                parse_mode=_HTML_PARSE
             )
         except Exception as e:
-            logger.error(f"Ошибка показа меню расписания: {str(e)}")
+            logger.error("Ошибка показа меню расписания: %s", e)
             await callback.answer("Ошибка обновления меню")
 
     async def show_help_menu(self, message: Message):
@@ -1913,21 +2353,22 @@ class AsyncTelegramBot:
         )
         await message.reply(help_text)
 
-    async def handle_set_mode(self, message: Message):
+    async def handle_set_mode(self, message: Message, command: CommandObject):
         """Обработчик команды /set_mode"""
         if not self.controller:
             await message.reply("❌ Контроллер не инициализирован")
             return
             
         try:
-            mode = message.text.split()[1].lower()
+            parts = (command.args or "").split(maxsplit=1)
+            mode = parts[0].lower() if parts else ""
             if mode not in ['schedule', 'delay']:
                 raise ValueError("Недопустимый режим")
                 
             self.controller.set_publication_mode(mode)
             await message.reply(f"✅ Режим изменен на '{mode}'")
         except Exception as e:
-            logger.error(f"Ошибка смены режима: {str(e)}")
+            logger.error("Ошибка смены режима: %s", e)
             await message.reply("❌ Используйте: /set_mode schedule или /set_mode delay")
     
     def set_controller(self, controller):
@@ -1936,109 +2377,95 @@ class AsyncTelegramBot:
         logger.info("Контроллер установлен для Telegram бота")
 
     async def handle_clear_history(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
         if not self.controller:
             await message.answer("⚠️ Контроллер не подключен")
             return
             
         try:
-            self.controller.state.state['sent_entries'] = {}
+            # Сброс и сохранение — одна операция в event loop, как и остальные вызовы save_state:
+            # в рабочем потоке json.dump шел бы параллельно с add_sent_entry/cleanup_old_entries
+            if not self.controller.state.clear_sent_entries():
+                await message.answer("⚠️ История очищена в памяти, но сохранить состояние на диск не удалось")
+                return
             await message.answer("✅ История отправленных постов очищена! Бот будет повторно отправлять новости.")
         except Exception as e:
-            logger.error(f"Error clearing history: {str(e)}")
+            logger.error("Error clearing history: %s", e)
             await message.answer(f"❌ Ошибка при очистке истории: {str(e)}")
 
     async def handle_params_list(self, message: Message) -> None:
-        if not await self.is_owner(message):
+        # Одно сообщение с первой страницей; остальные открываются кнопками правкой этого же сообщения
+        pages = self._params_pages()
+        await message.answer(pages[0], reply_markup=_params_page_keyboard(0, len(pages)), parse_mode=_HTML_PARSE)
+
+    async def show_params_page(self, callback: CallbackQuery, page_str: str) -> None:
+        """Показывает страницу /params_list (page_str — номер страницы с нуля)"""
+        # В списке есть ключи API: страницы только владельцу
+        if callback.from_user.id != self._owner_id:
             return
-            
-        params = []
-        for name in dir(self.config):
-            if name.isupper() and not name.startswith('_') and not callable(getattr(self.config, name)):
-                value = getattr(self.config, name)
-                value_type = type(value).__name__
-                
-                if isinstance(value, (list, tuple)) and len(value) > 3:
-                    display_value = f"{value[:3]}... ({len(value)} items)"
-                elif isinstance(value, str) and len(value) > 50:
-                    display_value = value[:50] + "..."
-                else:
-                    display_value = str(value)
-                    
-                params.append(f"• <b>{name}</b>: {display_value}")
-        
-        chunk_size = 15
-        for i in range(0, len(params), chunk_size):
-            chunk = params[i:i + chunk_size]
-            response = "⚙️ <b>Доступные параметры:</b>\n\n" + "\n".join(chunk)
-            if i + chunk_size < len(params):
-                response += "\n\n<i>Продолжение следует...</i>"
-            await message.answer(response, parse_mode="HTML")
-
-    async def handle_param_info(self, message: Message) -> None:
-        if not await self.is_owner(message):
+        if not page_str.isdigit():
+            logger.error("Ошибка парсинга: %s", callback.data)
             return
-            
-        args = message.text.split()
-        if len(args) < 2:
+        pages = self._params_pages()
+        # После изменения конфига страниц может стать меньше
+        page = min(int(page_str), len(pages) - 1)
+        await self._edit_screen(callback, pages[page], _params_page_keyboard(page, len(pages)))
+
+    def _params_pages(self) -> List[str]:
+        if self._params_cache_version != self.config.version:
+            self._params_cache = self._build_params_list()
+            self._params_cache_version = self.config.version
+        return self._params_cache
+
+    def _build_params_list(self) -> List[str]:
+        """Собирает страницы списка параметров (пересобирается только при изменении конфига)"""
+        params = []
+        for name in self._config_params_sorted:
+            value = getattr(self.config, name)
+            display_value = _PARAM_FORMATTERS.get(type(value), str)(value)
+            params.append(f"• <b>{name}</b>: {_html_text(display_value)}")
+        
+        # Режем готовый текст по границам строк, чтобы каждое сообщение уложилось в лимит Telegram
+        body = "\n".join(params)
+        chunks = []
+        start = 0
+        while len(body) - start > _PARAMS_CHUNK_LIMIT:
+            cut = body.rfind("\n", start, start + _PARAMS_CHUNK_LIMIT)
+            if cut <= start:
+                cut = start + _PARAMS_CHUNK_LIMIT
+            chunks.append(body[start:cut])
+            start = cut + 1 if body[cut] == "\n" else cut
+        chunks.append(body[start:])
+        
+        return [f"{_PARAMS_HEADER}{chunk}" for chunk in chunks]
+
+    async def handle_param_info(self, message: Message, command: CommandObject) -> None:
+        # Нужно только первое слово аргументов, хвост не разбираем
+        args = (command.args or "").split(None, 1)
+        if not args:
             await message.answer("❌ Укажите имя параметра")
             return
             
-        param_name = args[1].upper()
+        # Имена атрибутов интернированы, поэтому последующие поиски в словарях сравнивают указатели
+        param_name = sys.intern(args[0].upper())
         
-        if not hasattr(self.config, param_name):
+        if param_name not in self._config_params:
             await message.answer(f"❌ Параметр {param_name} не существует")
             return
             
         value = getattr(self.config, param_name)
-        value_type = type(value).__name__
-        
-        type_description = {
-            'int': 'целое число',
-            'float': 'число с плавающей точкой',
-            'bool': 'логическое значение (true/false)',
-            'str': 'строка',
-            'list': 'список значений (через запятую)',
-            'tuple': 'кортеж чисел (через запятую)'
-        }.get(value_type, value_type)
-        
-        examples = {
-            int: "42",
-            float: "3.14",
-            bool: "true или false",
-            str: "любая строка",
-            list: "item1, item2, item3",
-            tuple: "255, 255, 255"
-        }.get(type(value), str(value))
-        
-        response = (
-            f"ℹ️ <b>Информация о параметре:</b>\n\n"
-            f"<b>Имя:</b> {param_name}\n"
-            f"<b>Тип:</b> {value_type} ({type_description})\n"
-            f"<b>Текущее значение:</b> {value}\n\n"
-            f"<b>Примеры значений:</b>\n"
-            f"{examples}\n\n"
-            f"<b>Изменить командой:</b>\n"
-            f"<code>/set_all {param_name} [новое_значение]</code>"
-        )
-        
-        await message.answer(response, parse_mode="HTML")
+        response = _render_param_info(param_name, type(value), str(value))
+        await message.answer(response, parse_mode=_HTML_PARSE)
 
-    async def handle_set_all(self, message: Message) -> None:
-        if not await self.is_owner(message):
-            return
-            
-        args = message.text.split()
-        if len(args) < 3:
+    async def handle_set_all(self, message: Message, command: CommandObject) -> None:
+        parts = (command.args or "").split(maxsplit=1)
+        if len(parts) < 2:
             await message.answer("❌ Используйте: /set_all [параметр] [значение]")
             return
+        head, new_value_str = parts[0], parts[1].strip()
             
-        param_name = args[1].upper()
-        new_value_str = " ".join(args[2:])
+        param_name = sys.intern(head.upper())
         
-        if not hasattr(self.config, param_name):
+        if param_name not in self._config_params:
             await message.answer(f"❌ Параметр {param_name} не существует")
             return
             
@@ -2046,46 +2473,45 @@ class AsyncTelegramBot:
         value_type = type(current_value)
         
         try:
-            if value_type is bool:
-                converted_value = new_value_str.lower() in ['true', '1', 'yes', 'y', 't', 'on']
-            elif value_type is int:
-                converted_value = int(new_value_str)
-            elif value_type is float:
-                converted_value = float(new_value_str)
-            elif value_type is list:
-                converted_value = [item.strip() for item in new_value_str.split(',')]
-            elif value_type is tuple:
-                converted_value = tuple(map(int, new_value_str.split(',')))
-            elif value_type is str:
-                converted_value = new_value_str
-            else:
-                converted_value = value_type(new_value_str)
+            converter = _CONVERTERS.get(value_type)
+            if converter is None:
+                converter = _CONVERTERS[list] if issubclass(value_type, list) else value_type
+            converted_value = converter(new_value_str)
             
             setattr(self.config, param_name, converted_value)
-            self.config.save_to_env_file(param_name, str(converted_value))
-            
-            response = (
-                f"✅ <b>Параметр успешно обновлен!</b>\n\n"
-                f"<b>Параметр:</b> {param_name}\n"
-                f"<b>Старое значение:</b> {current_value}\n"
-                f"<b>Новое значение:</b> {converted_value}\n\n"
+            value_str = str(converted_value)
+            await asyncio.to_thread(self.config.save_to_env_file, param_name, value_str)
+            if param_name == 'OWNER_ID':
+                self._sync_owner_id()
+            
+            response = _SET_ALL_OK_TEMPLATE.format(
+                name=param_name,
+                old=_html_text(str(current_value)),
+                new=_html_text(value_str),
             )
+            if param_name in _RESTART_PARAMS:
+                response += _RESTART_NOTE
             
-            critical_params = ['TOKEN', 'CHANNEL_ID', 'OWNER_ID', 'YANDEX_API_KEY']
-            if param_name in critical_params:
-                response += "⚠️ <i>Для применения изменений может потребоваться перезагрузка бота</i>"
-            
-            await message.answer(response, parse_mode="HTML")
+            await message.answer(response, parse_mode=_HTML_PARSE)
         except (TypeError, ValueError) as e:
-            await message.answer(
-                f"❌ <b>Ошибка преобразования значения:</b>\n"
-                f"Параметр: {param_name}\n"
-                f"Требуемый тип: {value_type.__name__}\n"
-                f"Ошибка: {str(e)}",
-                parse_mode="HTML"
-            )
+            await message.answer(_format_conversion_error(param_name, value_type, e), parse_mode=_HTML_PARSE)
+
+    @staticmethod
+    def _on_background_task_done(task: asyncio.Task) -> None:
+        """Логирует неожиданное завершение фоновой задачи"""
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.error("Фоновая задача %s упала: %s", task.get_name(), exc, exc_info=exc)
 
     async def close(self) -> None:
-        if hasattr(self, 'cleanup_task'):
-            self.cleanup_task.cancel()
+        """Останавливает фоновые задачи и закрывает HTTP-сессию бота"""
+        for timer in self._msg_batch_timer.values():
+            timer.cancel()
+        tasks = (self.cleanup_task, *self._batch_tasks, *self._bg_tasks)
+        for task in tasks:
+            task.cancel()
+        # Дожидаемся отмены, чтобы задачи не были уничтожены в состоянии pending
+        await asyncio.gather(*tasks, return_exceptions=True)
         await self.bot.session.close()
\ No newline at end of file
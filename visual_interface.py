@@ -1,4 +1,6 @@
-from typing import Any, Optional, Dict, List
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Tuple
+from collections import OrderedDict
+from functools import lru_cache
 from aiogram.types import (
     InlineKeyboardMarkup, 
     InlineKeyboardButton,
@@ -12,13 +14,63 @@ from config import Config
 import asyncio
 import os
 import logging
-import matplotlib.pyplot as plt
-import numpy as np
 from io import BytesIO
 import time
 
 logger = logging.getLogger('VisualInterface')
 
+@lru_cache(maxsize=4)
+def _render_stats_png(posts: Tuple[int, ...]) -> bytes:
+    """Рисует график активности по часам в PNG.
+    Объектный API matplotlib без pyplot: нет глобального состояния, безопасно в потоке,
+    а фигура освобождается вместе с объектом. Пока счетчики не изменились,
+    повторный /stats получает готовую картинку."""
+    # matplotlib грузится только при первом запросе графика (и уже в рабочем потоке):
+    # старт бота не платит за импорт. Figure без pyplot не поднимает GUI-бэкенд,
+    # PNG рисуется через Agg.
+    from matplotlib.figure import Figure
+    hours = list(range(24))
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    ax.bar(hours, posts, color='#4CAF50')
+    ax.set_title('Активность по часам')
+    ax.set_xlabel('Часы')
+    ax.set_ylabel('Посты')
+    ax.set_xticks(hours)
+    ax.grid(axis='y', alpha=0.5)
+    buf = BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    return buf.getvalue()
+
+@lru_cache(maxsize=8)
+def _preview_font(font_path: str):
+    """Шрифт превью: truetype читает и разбирает файл, поэтому загружается один раз на путь"""
+    from PIL import ImageFont
+    return ImageFont.truetype(font_path, 32) if os.path.exists(font_path) else ImageFont.load_default()
+
+@lru_cache(maxsize=16)
+def _render_preview_png(font_path: str, text_color: tuple, stroke_color: tuple, stroke_width: int) -> bytes:
+    """Рисует пример текста с текущими настройками изображений в PNG.
+    Результат зависит только от аргументов, поэтому повторный показ экрана берет готовые байты."""
+    from PIL import Image, ImageDraw
+    img = Image.new('RGB', (400, 200), (40, 40, 60))
+    draw = ImageDraw.Draw(img)
+    font = _preview_font(font_path)
+    
+    # Текст с текущими настройками
+    draw.text(
+        (200, 100), 
+        "Пример текста", 
+        fill=text_color,
+        stroke_fill=stroke_color,
+        stroke_width=stroke_width,
+        font=font,
+        anchor="mm"
+    )
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
 class UIBuilder:
     THEMES = {
         'default': {
@@ -47,10 +99,25 @@ class UIBuilder:
     # Новое поле для хранения временных настроек
     user_editing_states: Dict[int, Dict[str, Any]] = {}  # Для AI настроек
     user_general_editing_states: Dict[int, Dict[str, Any]] = {}  # Для основных настроек
+    KB_CACHE_SIZE = 256  # Максимум клавиатур выбора в LRU-кэше
 
     def __init__(self, config: Config):
         self.config = config
         self.user_themes = {}
+        self._kb_cache: "OrderedDict[Tuple, InlineKeyboardMarkup]" = OrderedDict()
+
+    def _cached_markup(self, key: Tuple, build: Callable[[], InlineKeyboardMarkup]) -> InlineKeyboardMarkup:
+        """Возвращает клавиатуру из LRU-кэша или строит ее при промахе.
+        Ключ включает отмеченное значение, поэтому смена настройки дает новую запись."""
+        cache = self._kb_cache
+        markup = cache.get(key)
+        if markup is None:
+            markup = cache[key] = build()
+            if len(cache) > self.KB_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return markup
     
     def get_theme(self, user_id: int) -> dict:
         return self.user_themes.get(user_id, self.THEMES['default'])
@@ -63,87 +130,82 @@ class UIBuilder:
         
         theme = self.get_theme(user_id)
         
-        # Основные кнопки меню
-        buttons = [
-            [
-                InlineKeyboardButton(
-                    text=f"{theme['primary']} Главная",
-                    callback_data="main"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=f"{theme['text']} Мониторинг",
-                    callback_data="monitoring"
-                ),
-                InlineKeyboardButton(
-                    text=f"{theme['text']} Настройки",
-                    callback_data="settings"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=f"{theme['text']} Статистика",
-                    callback_data="stats"
-                ),
-                InlineKeyboardButton(
-                    text=f"{theme['text']} RSS Ленты",
-                    callback_data="rss_list"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=f"{theme['success']} Запустить",
-                    callback_data="start_bot"
-                ),
-                InlineKeyboardButton(
-                    text=f"{theme['warning']} Остановить",
-                    callback_data="stop_bot"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="🎨 Сменить тему",
-                    callback_data="change_theme"
-                )
+        def build() -> InlineKeyboardMarkup:
+            # Основные кнопки меню
+            buttons = [
+                [
+                    InlineKeyboardButton(
+                        text=f"{theme['primary']} Главная",
+                        callback_data="main"
+                    )
+                ],
+                [
+                    InlineKeyboardButton(
+                        text=f"{theme['text']} Мониторинг",
+                        callback_data="monitoring"
+                    ),
+                    InlineKeyboardButton(
+                        text=f"{theme['text']} Настройки",
+                        callback_data="settings"
+                    )
+                ],
+                [
+                    InlineKeyboardButton(
+                        text=f"{theme['text']} Статистика",
+                        callback_data="stats"
+                    ),
+                    InlineKeyboardButton(
+                        text=f"{theme['text']} RSS Ленты",
+                        callback_data="rss_list"
+                    )
+                ],
+                [
+                    InlineKeyboardButton(
+                        text=f"{theme['success']} Запустить",
+                        callback_data="start_bot"
+                    ),
+                    InlineKeyboardButton(
+                        text=f"{theme['warning']} Остановить",
+                        callback_data="stop_bot"
+                    )
+                ],
+                [
+                    InlineKeyboardButton(
+                        text="🎨 Сменить тему",
+                        callback_data="change_theme"
+                    )
+                ]
             ]
-        ]
+            return InlineKeyboardMarkup(inline_keyboard=buttons)
+        
+        # Кнопки зависят только от темы: одна разметка на тему
+        return self._cached_markup(
+            ('main_menu', theme['primary'], theme['text'], theme['success'], theme['warning']), build
+        )
+    
+    def _back_to_settings_markup(self) -> InlineKeyboardMarkup:
+        def build() -> InlineKeyboardMarkup:
+            builder = InlineKeyboardBuilder()
+            builder.button(
+                text="◀️ Назад",
+                callback_data="settings"
+            )
+            return builder.as_markup()
         
-        return InlineKeyboardMarkup(inline_keyboard=buttons)
+        return self._cached_markup(('back_to_settings',), build)
     
     async def back_to_settings(self) -> InlineKeyboardMarkup:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text="◀️ Назад",
-            callback_data="settings"
-        )
-        return builder.as_markup()
+        return self._back_to_settings_markup()
     
     async def back_button(self) -> InlineKeyboardMarkup:
         """Кнопка 'Назад' для меню настроек"""
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text="◀️ Назад",
-            callback_data="settings"
-        )
-        return builder.as_markup()
+        return self._back_to_settings_markup()
 
-    async def stats_visualization(self, stats: dict) -> tuple:
-        """Генерирует визуализацию статистики"""
+    async def stats_visualization(self, stats: dict, hourly_posts: Optional[List[int]] = None) -> tuple:
+        """Генерирует визуализацию статистики (hourly_posts — 24 счетчика постов по часам)"""
         try:
-            # График активности по часам
-            plt.figure(figsize=(10, 6))
-            
-            # Данные для графика (пример)
-            hours = list(range(24))
-            posts = [stats.get(f'hour_{h}', 0) for h in hours]
-            
-            plt.bar(hours, posts, color='#4CAF50')
-            plt.title('Активность по часам')
-            plt.xlabel('Часы')
-            plt.ylabel('Посты')
-            plt.xticks(hours)
-            plt.grid(axis='y', alpha=0.5)
+            # Снимок-кортеж: ключ кэша графика, и контроллер может менять счетчики, пока идет отрисовка
+            posts = tuple(hourly_posts) if hourly_posts else (0,) * 24
             
             summary = (
                 "📊 <b>Статистика производительности</b>\n\n"
@@ -155,11 +217,8 @@ class UIBuilder:
                 f"▸ Аптайм: <b>{stats.get('uptime', '0:00')}</b>"
             )
 
-            # В методе stats_visualization
-            buf = BytesIO()
-            plt.savefig(buf, format='png', bbox_inches='tight')
-            buf.seek(0)
-            image_data = buf.getvalue()  # Получаем байты
+            # Отрисовка занимает сотни миллисекунд: выносим ее из цикла событий
+            image_data = await asyncio.to_thread(_render_stats_png, posts)
             photo = BufferedInputFile(image_data, filename="stats.png")  # Создаем InputFile
             return summary, InputMediaPhoto(media=photo, caption=summary)
             
@@ -169,39 +228,42 @@ class UIBuilder:
 
     async def settings_menu(self, user_id: int) -> InlineKeyboardMarkup:
         theme = self.get_theme(user_id)
-        builder = InlineKeyboardBuilder()
         
-        builder.button(
-            text=f"{theme['text']} Основные", 
-            callback_data="settings_general"
-        )
-        builder.button(
-            text=f"{theme['text']} Изображения", 
-            callback_data="settings_images"
-        )
-        builder.button(
-            text=f"{theme['text']} AI", 
-            callback_data="settings_ai"
-        )
-        builder.button(
-            text=f"{theme['text']} RSS", 
-            callback_data="settings_rss"
-        )
-        builder.button(
-            text=f"{theme['text']} Оповещения", 
-            callback_data="settings_notify"
-        )
-        builder.button(
-            text=f"{theme['primary']} Назад", 
-            callback_data="main_menu"
-        )
+        def build() -> InlineKeyboardMarkup:
+            builder = InlineKeyboardBuilder()
+            
+            builder.button(
+                text=f"{theme['text']} Основные", 
+                callback_data="settings_general"
+            )
+            builder.button(
+                text=f"{theme['text']} Изображения", 
+                callback_data="settings_images"
+            )
+            builder.button(
+                text=f"{theme['text']} AI", 
+                callback_data="settings_ai"
+            )
+            builder.button(
+                text=f"{theme['text']} RSS", 
+                callback_data="settings_rss"
+            )
+            builder.button(
+                text=f"{theme['text']} Оповещения", 
+                callback_data="settings_notify"
+            )
+            builder.button(
+                text=f"{theme['primary']} Назад", 
+                callback_data="main_menu"
+            )
+            
+            builder.adjust(2, 2, 2, 1)
+            return builder.as_markup()
         
-        builder.adjust(2, 2, 2, 1)
-        return builder.as_markup()
+        return self._cached_markup(('settings_menu', theme['text'], theme['primary']), build)
 
     async def image_settings_view(self, user_id: int) -> tuple:
         """Возвращает визуальное представление настроек изображений"""
-        theme = self.get_theme(user_id)
         text = (
             "🖼 <b>Текущие настройки изображений</b>\n\n"
             f"▸ Источник: <b>{self.config.IMAGE_SOURCE.capitalize()}</b>\n"
@@ -213,31 +275,14 @@ class UIBuilder:
         
         # Создаем пример изображения
         try:
-            from PIL import Image, ImageDraw, ImageFont
-            img = Image.new('RGB', (400, 200), (40, 40, 60))
-            draw = ImageDraw.Draw(img)
-            
-            # Загрузка шрифта
             font_path = os.path.join(self.config.FONTS_DIR, self.config.DEFAULT_FONT)
-            font = ImageFont.truetype(font_path, 32) if os.path.exists(font_path) else ImageFont.load_default()
-            
-            # Текст с текущими настройками
-            draw.text(
-                (200, 100), 
-                "Пример текста", 
-                fill=tuple(self.config.TEXT_COLOR),
-                stroke_fill=tuple(self.config.STROKE_COLOR),
-                stroke_width=self.config.STROKE_WIDTH,
-                font=font,
-                anchor="mm"
+            image_data = await asyncio.to_thread(
+                _render_preview_png,
+                font_path,
+                tuple(self.config.TEXT_COLOR),
+                tuple(self.config.STROKE_COLOR),
+                self.config.STROKE_WIDTH
             )
-            
-            # Сохраняем в буфер
-            # В методе image_settings_view
-            buf = BytesIO()
-            img.save(buf, format='PNG')
-            buf.seek(0)
-            image_data = buf.getvalue()
             photo = BufferedInputFile(image_data, filename="preview.png")
             return text, InputMediaPhoto(media=photo, caption=text)
             
@@ -246,21 +291,25 @@ class UIBuilder:
             return text, None
 
     async def theme_selector(self, user_id: int) -> InlineKeyboardMarkup:
-        builder = InlineKeyboardBuilder()
-        
-        for theme_name in self.THEMES:
+        def build() -> InlineKeyboardMarkup:
+            builder = InlineKeyboardBuilder()
+            
+            for theme_name in self.THEMES:
+                builder.button(
+                    text=f"{self.THEMES[theme_name]['primary']} {theme_name.capitalize()}",
+                    callback_data=f"set_theme_{theme_name}"
+                )
+            
             builder.button(
-                text=f"{self.THEMES[theme_name]['primary']} {theme_name.capitalize()}",
-                callback_data=f"set_theme_{theme_name}"
+                text="◀️ Назад",
+                callback_data="settings"
             )
+            
+            builder.adjust(2, 1)
+            return builder.as_markup()
         
-        builder.button(
-            text="◀️ Назад",
-            callback_data="settings"
-        )
-        
-        builder.adjust(2, 1)
-        return builder.as_markup()
+        # Список тем не зависит от пользователя
+        return self._cached_markup(('theme_selector',), build)
 
     async def progress_bar(self, current: int, total: int) -> str:
         """Генерирует текстовый прогресс-бар"""
@@ -269,16 +318,18 @@ class UIBuilder:
         empty = bar_length - filled
         return f"[{'■' * filled}{'□' * empty}] {current}/{total}"
 
-    async def animated_processing(self, message, process_name: str, duration: int = 5):
-        """Отображает анимированный процесс"""
+    async def animated_processing(self, message, process_name: str, work: Awaitable[Any]) -> Any:
+        """Показывает статус процесса, пока выполняется work.
+        Одно сообщение в начале и одна правка по завершении: покадровая анимация тратила
+        десяток запросов к Telegram на каждое нажатие и задерживала саму операцию."""
         status_msg = await message.answer(f"🔄 {process_name}...")
-        
-        for i in range(1, 11):
-            await asyncio.sleep(duration / 10)
-            bar = "⬛" * i + "⬜" * (10 - i)
-            await status_msg.edit_text(f"⏳ {process_name}\n{bar} {i*10}%")
-        
+        try:
+            result = await work
+        except Exception:
+            await status_msg.edit_text(f"❌ {process_name}: ошибка")
+            raise
         await status_msg.edit_text(f"✅ {process_name} завершено!")
+        return result
 
     async def rss_feed_status(self, feeds: list) -> str:
         """Визуализация статуса RSS-лент"""
@@ -337,17 +388,20 @@ class UIBuilder:
             'min_delay': [10, 30, 60, 120]
         }
         
-        builder = InlineKeyboardBuilder()
-        for value in presets.get(param, []):
-            builder.button(
-                text=f"{'✅ ' if value == current_value else ''}{value}",
-                callback_data=f"set_general_{param}:{value}"
-            )
+        def build() -> InlineKeyboardMarkup:
+            builder = InlineKeyboardBuilder()
+            for value in presets.get(param, []):
+                builder.button(
+                    text=f"{'✅ ' if value == current_value else ''}{value}",
+                    callback_data=f"set_general_{param}:{value}"
+                )
+            
+            builder.button(text="🔢 Вручную", callback_data=f"set_general_{param}_custom")
+            builder.button(text="◀️ Назад", callback_data="edit_general_settings")
+            builder.adjust(2, 2, 1)
+            return builder.as_markup()
         
-        builder.button(text="🔢 Вручную", callback_data=f"set_general_{param}_custom")
-        builder.button(text="◀️ Назад", callback_data="edit_general_settings")
-        builder.adjust(2, 2, 1)
-        return builder.as_markup()
+        return self._cached_markup(('general', param, current_value), build)
     
     async def start_general_edit(self, user_id: int):
         """Начинает редактирование основных настроек"""
@@ -457,15 +511,18 @@ class UIBuilder:
         if user_id in self.user_editing_states:
             current_model = self.user_editing_states[user_id].get('model', current_model)
         
-        builder = InlineKeyboardBuilder()
-        for model in ['yandexgpt-lite', 'yandexgpt-pro']:
-            builder.button(
-                text=f"{'✅ ' if model == current_model else ''}{model}",
-                callback_data=f"set_ai_model:{model}"
-            )
-        builder.button(text="◀️ Назад", callback_data="edit_ai_settings")
-        builder.adjust(1, 1)
-        return builder.as_markup()
+        def build() -> InlineKeyboardMarkup:
+            builder = InlineKeyboardBuilder()
+            for model in ['yandexgpt-lite', 'yandexgpt-pro']:
+                builder.button(
+                    text=f"{'✅ ' if model == current_model else ''}{model}",
+                    callback_data=f"set_ai_model:{model}"
+                )
+            builder.button(text="◀️ Назад", callback_data="edit_ai_settings")
+            builder.adjust(1, 1)
+            return builder.as_markup()
+        
+        return self._cached_markup(('ai_model', current_model), build)
 
     async def ai_temp_selector(self, user_id: int) -> InlineKeyboardMarkup:
         """Клавиатура выбора температуры"""
@@ -473,16 +530,19 @@ class UIBuilder:
         if user_id in self.user_editing_states:
             current_temp = self.user_editing_states[user_id].get('temperature', current_temp)
         
-        builder = InlineKeyboardBuilder()
-        for temp in [0.1, 0.3, 0.5, 0.7, 0.9]:
-            builder.button(
-                text=f"{'✅ ' if abs(temp - current_temp) < 0.01 else ''}{temp}",
-                callback_data=f"set_ai_temp:{temp}"
-            )
-        builder.button(text="🔢 Вручную", callback_data="set_ai_temp_custom")
-        builder.button(text="◀️ Назад", callback_data="edit_ai_settings")
-        builder.adjust(2, 2, 2, 1)
-        return builder.as_markup()
+        def build() -> InlineKeyboardMarkup:
+            builder = InlineKeyboardBuilder()
+            for temp in [0.1, 0.3, 0.5, 0.7, 0.9]:
+                builder.button(
+                    text=f"{'✅ ' if abs(temp - current_temp) < 0.01 else ''}{temp}",
+                    callback_data=f"set_ai_temp:{temp}"
+                )
+            builder.button(text="🔢 Вручную", callback_data="set_ai_temp_custom")
+            builder.button(text="◀️ Назад", callback_data="edit_ai_settings")
+            builder.adjust(2, 2, 2, 1)
+            return builder.as_markup()
+        
+        return self._cached_markup(('ai_temp', current_temp), build)
 
     async def ai_tokens_selector(self, user_id: int) -> InlineKeyboardMarkup:
         """Клавиатура выбора токенов"""
@@ -490,16 +550,19 @@ class UIBuilder:
         if user_id in self.user_editing_states:
             current_tokens = self.user_editing_states[user_id].get('max_tokens', current_tokens)
         
-        builder = InlineKeyboardBuilder()
-        for tokens in [1000, 2000, 3000, 4000, 5000]:
-            builder.button(
-                text=f"{'✅ ' if tokens == current_tokens else ''}{tokens}",
-                callback_data=f"set_ai_tokens:{tokens}"
-            )
-        builder.button(text="🔢 Вручную", callback_data="set_ai_tokens_custom")
-        builder.button(text="◀️ Назад", callback_data="edit_ai_settings")
-        builder.adjust(2, 2, 2, 1)
-        return builder.as_markup()
+        def build() -> InlineKeyboardMarkup:
+            builder = InlineKeyboardBuilder()
+            for tokens in [1000, 2000, 3000, 4000, 5000]:
+                builder.button(
+                    text=f"{'✅ ' if tokens == current_tokens else ''}{tokens}",
+                    callback_data=f"set_ai_tokens:{tokens}"
+                )
+            builder.button(text="🔢 Вручную", callback_data="set_ai_tokens_custom")
+            builder.button(text="◀️ Назад", callback_data="edit_ai_settings")
+            builder.adjust(2, 2, 2, 1)
+            return builder.as_markup()
+        
+        return self._cached_markup(('ai_tokens', current_tokens), build)
 
     async def start_ai_edit(self, user_id: int):
         """Начинает редактирование настроек AI для пользователя"""
@@ -4,11 +4,109 @@ import re
 import html
 import aiohttp
 import asyncio
-from typing import Dict, Optional
+import random
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger('AsyncYandexGPT')
 
+# Регулярные выражения компилируются один раз при импорте модуля
+_PARA_SPLIT_RE = re.compile(r'\n\n|\n-|\n•')
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+
+# Разбор JSON: orjson, если установлен; его JSONDecodeError наследует json.JSONDecodeError
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _json_dumps(obj) -> bytes:
+    """Тело запроса в UTF-8: orjson, если установлен; кириллица без \\uXXXX-экранирования"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+# Ответы API, после которых запрос имеет смысл повторить
+_RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Оценка токенов: ~4 символа на токен. Подсчёт по словам занижал русский текст в разы
+_CHARS_PER_TOKEN = 4
+
+
+def _estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов без токенизатора"""
+    return max(1, len(text) // _CHARS_PER_TOKEN) if text else 0
+
+
+# Управляющие символы C0, DEL и C1: удаляются из текста промпта в таблице translate ниже
+_CTRL_CODES = (*range(0x20), *range(0x7F, 0xA0))
+
+# Таблица для пользовательского текста в промпте: все замены и удаление управляющих
+# символов за один проход translate. Кавычки не перечислены: их уже экранирует html.escape
+_PROMPT_TRANS = str.maketrans({
+    **dict.fromkeys(_CTRL_CODES),
+    '{': '{{',
+    '}': '}}',
+    '[': '【',
+    ']': '】',
+    '(': '（',
+    ')': '）',
+    '\n': ' ',
+    '\r': ' ',
+    '\t': ' ',
+})
+
+# Управляющие символы в тексте ответа: удаляются одним re.sub, затем html.escape.
+# Оба прохода идут в C и на русском тексте быстрее str.translate по таблице-словарю
+_CTRL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]+')
+
+# Шаблоны извлечения заголовка и описания из свободного ответа модели.
+# Захваты ограничены классом символов и длиной: без DOTALL и без '.+?' по всему ответу
+# выражение не перебирает текст до конца от каждого вхождения ключевого слова.
+# DOTALL оставлен только для тегов <title>/<description>, которые могут занимать несколько строк
+_EXTRACT_PATTERNS = tuple(re.compile(p, flags) for p, flags in (
+    (r'title["\']?:\s*["\']([^"\'\n]{1,2000})["\']', re.IGNORECASE),
+    (r'заголовок["\']?:\s*["\']([^"\'\n]{1,2000})["\']', re.IGNORECASE),
+    (r'(?:title|заголовок)[\s:]*["\']?([^\n.]{1,2000}?)["\']?(?:\n|$|\.)', re.IGNORECASE),
+    (r'(?:description|описание)[\s:]*["\']?([^\n.]{1,2000}?)["\']?(?:\n|$|\.)', re.IGNORECASE),
+    (r'{"title"\s*:\s*"([^"]+)"[^}]*"description"\s*:\s*"([^"]+)"}', re.IGNORECASE),
+    (r'<title>(.{1,2000}?)</title>\s*<description>(.{1,10000}?)</description>', re.IGNORECASE | re.DOTALL),
+    (r'(?:заголовок|title):?\s*([^\n]+)\n+(?:описание|description):?\s*([^\n]+)', re.IGNORECASE),
+))
+
+# Признаки низкокачественного ответа: фразы ищутся как подстроки в тексте в нижнем регистре,
+# регулярное выражение нужно только для Markdown-ссылок
+_LOW_QUALITY_PHRASES = (
+    "в интернете есть много сайтов",
+    "посмотрите, что нашлось в поиске",
+    "дополнительные материалы:",
+    "смотрите также:",
+    "читайте далее",
+    "читайте также",
+    "рекомендуем прочитать",
+    "подробнее на сайте",
+    "другие источники:",
+    "больше информации можно найти",
+)
+_MD_LINK_RE = re.compile(r"\[.*?\]\(https?://[^\)]+\)", re.IGNORECASE)
+
 class AsyncYandexGPT:
+    MAX_RETRIES = 3  # Повторов запроса после 429/5xx
+    RETRY_BASE_DELAY = 1.0  # Первая пауза экспоненциального отступа, сек
+    RETRY_MAX_DELAY = 30.0  # Потолок паузы между повторами, сек
+    MAX_CONCURRENT_REQUESTS = 4  # Одновременных запросов к API
+    REQUESTS_PER_SECOND = 10.0  # Скорость token bucket и его емкость
+    MIN_REQUEST_RATE = 0.5  # Нижняя граница скорости после серии 429
+    RATE_RECOVERY = 0.5  # Прибавка к скорости за каждый успешный запрос
+    RESULT_CACHE_TTL = 3600.0  # Время жизни закешированного ответа, сек
+    RESULT_CACHE_SIZE = 256  # Максимум ответов в кеше
+
     def __init__(self, config, session: aiohttp.ClientSession):
         self.config = config
         self.session = session
@@ -17,6 +115,19 @@ class AsyncYandexGPT:
         session_ok = not session.closed if session else False
         self.active = bool(config.YANDEX_API_KEY) and config.ENABLE_YAGPT and session_ok
         self.last_error = None
+        # Ограничение параллельных запросов: всплеск постов не превращается в шторм 429
+        self._request_slots = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        # Token bucket: запросы допускаются равномерно, после 429 скорость снижается вдвое
+        self._rate = self.REQUESTS_PER_SECOND
+        self._tokens = self.REQUESTS_PER_SECOND
+        self._tokens_updated = time.monotonic()
+        self._bucket_lock = asyncio.Lock()  # FIFO: токены выдаются в порядке поступления
+        # Кеш удачных ответов: пост, не дошедший до канала после обработки ИИ,
+        # в следующем цикле не оплачивается повторным запросом
+        self._result_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # Неизменная часть тела запроса; пересобирается только при смене модели или параметров
+        self._payload_key: Optional[Tuple] = None
+        self._payload_template: Dict = {}
         
         # Инициализация статистики
         self.stats = {
@@ -42,7 +153,7 @@ class AsyncYandexGPT:
             "x-folder-id": config.YANDEX_FOLDER_ID,
             "Content-Type": "application/json"
         }
-        logger.info(f"YandexGPT initialized. Active: {self.active}, Model: {config.YAGPT_MODEL}")
+        logger.info("YandexGPT initialized. Active: %s, Model: %s", self.active, config.YAGPT_MODEL)
 
     def is_available(self) -> bool:
         """Проверяет, доступен ли сервис в текущий момент"""
@@ -66,26 +177,7 @@ class AsyncYandexGPT:
         if not isinstance(text, str):
             return ""
 
-        sanitized = html.escape(text)
-        replacements = {
-            '{': '{{',
-            '}': '}}',
-            '[': '【',
-            ']': '】',
-            '(': '（',
-            ')': '）',
-            '"': '\\"',
-            "'": "\\'",
-            '\n': ' ',
-            '\r': ' ',
-            '\t': ' '
-        }
-
-        for char, replacement in replacements.items():
-            sanitized = sanitized.replace(char, replacement)
-
-        sanitized = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', sanitized)
-        return sanitized[:5000]
+        return html.escape(text).translate(_PROMPT_TRANS)[:5000]
 
     async def enhance(self, title: str, description: str) -> Optional[Dict]:
         """
@@ -95,6 +187,12 @@ class AsyncYandexGPT:
         if not self.active or not self.is_available():
             return None
 
+        cache_key = self._cache_key(title, description)
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            logger.debug("YandexGPT cache hit: %.50s", title)
+            return cached
+
         try:
             # Проверка состояния сессии перед использованием
             if self.session.closed:
@@ -102,8 +200,12 @@ class AsyncYandexGPT:
                 self.active = False
                 return None
 
-            # Подсчет токенов (простая оценка)
-            tokens = len(title.split()) + len(description.split())
+            # Подсчет токенов (оценка по длине): текст поста и шаблон промпта
+            tokens = (
+                _estimate_tokens(title)
+                + _estimate_tokens(description)
+                + _estimate_tokens(self.config.YAGPT_PROMPT)
+            )
 
             # Проверка на превышение лимита токенов
             max_tokens = min(
@@ -112,7 +214,7 @@ class AsyncYandexGPT:
             )
             
             if tokens > max_tokens * 0.8:  # Оставляем запас
-                logger.warning(f"Content too long: {tokens}/{max_tokens} tokens")
+                logger.warning("Content too long: %d/%d tokens", tokens, max_tokens)
                 return None
 
             # Формирование промпта
@@ -127,72 +229,79 @@ class AsyncYandexGPT:
                 self.MODEL_URIS['lite']  # Fallback
             )
 
-            # Подготовка данных для запроса
+            # Подготовка данных для запроса: меняется только сообщение
             request_data = {
-                "modelUri": model_uri,
-                "completionOptions": {
-                    "stream": False,
-                    "temperature": self.config.YAGPT_TEMPERATURE,
-                    "maxTokens": max_tokens
-                },
-                "messages": [
-                    {
-                        "role": "user",
-                        "text": prompt
-                    }
-                ]
+                **self._payload_shell(model_uri, max_tokens),
+                "messages": [{"role": "user", "text": prompt}]
             }
 
             # Логирование для отладки
-            logger.debug(f"YandexGPT request to {self.config.YANDEX_API_ENDPOINT}")
-            logger.debug(f"Model: {self.config.YAGPT_MODEL}, URI: {model_uri}")
-            logger.debug(f"Prompt: {prompt[:200]}...")
-
-            # Отправка запроса
-            async with self.session.post(
-                self.config.YANDEX_API_ENDPOINT,
-                headers={
-                    "Authorization": f"Api-Key {self.config.YANDEX_API_KEY}",
-                    "Content-Type": "application/json",
-                    "x-folder-id": self.config.YANDEX_FOLDER_ID
-                },
-                json=request_data,
-                timeout=aiohttp.ClientTimeout(total=60 if self.config.YAGPT_MODEL == 'pro' else 30)
-            ) as response:
-
-                response_text = await response.text()
-                
-                if response.status != 200:
-                    self._handle_error(response.status, response_text, request_data)
-                    return None
+            logger.debug("YandexGPT request to %s", self.config.YANDEX_API_ENDPOINT)
+            logger.debug("Model: %s, URI: %s", self.config.YAGPT_MODEL, model_uri)
+            logger.debug("Prompt: %.200s...", prompt)
+
+            # Отправка запроса: 429 и 5xx повторяются ограниченное число раз с нарастающей паузой.
+            # Промпт и тело запроса собраны выше один раз и переиспользуются в повторах
+            timeout = aiohttp.ClientTimeout(total=60 if self.config.YAGPT_MODEL == 'pro' else 30)
+            # Сериализуется один раз; Content-Type: application/json уже в self.headers
+            body = _json_dumps(request_data)
+            delay = 0.0
+            for attempt in range(self.MAX_RETRIES + 1):
+                if delay:
+                    await asyncio.sleep(delay)
+                await self._acquire_token()
+                # Слот держится только на время запроса; пауза перед повтором его не занимает
+                async with self._request_slots, self.session.post(
+                    self.config.YANDEX_API_ENDPOINT,
+                    headers=self.headers,
+                    data=body,
+                    timeout=timeout
+                ) as response:
+                    response_text = await response.text()
+                    
+                    if response.status == 429:
+                        self._rate = max(self.MIN_REQUEST_RATE, self._rate / 2)
+                    elif response.status == 200:
+                        self._rate = min(self.REQUESTS_PER_SECOND, self._rate + self.RATE_RECOVERY)
+
+                    if response.status in _RETRYABLE_STATUSES and attempt < self.MAX_RETRIES:
+                        delay = self._retry_delay(response.headers.get('Retry-After'), attempt)
+                        logger.warning("YandexGPT HTTP %s, повтор через %.1f с", response.status, delay)
+                        continue
+                    
+                    if response.status != 200:
+                        self._handle_error(response.status, response_text, request_data)
+                        return None
 
-                try:
-                    data = await response.json()
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON response: {response_text[:500]}")
-                    self._handle_error(500, "Invalid JSON", request_data)
-                    return None
+                    try:
+                        # Тело уже прочитано как текст: разбираем его, а не декодируем ответ повторно
+                        data = _json_loads(response_text)
+                    except json.JSONDecodeError:
+                        logger.error("Invalid JSON response: %.500s", response_text)
+                        self._handle_error(500, "Invalid JSON", request_data)
+                        return None
 
-                # Логирование сырого ответа
-                logger.debug(f"Raw response: {json.dumps(data, ensure_ascii=False)[:500]}...")
+                    # Логирование сырого ответа: исходный текст, без повторной сериализации data
+                    logger.debug("Raw response: %.500s...", response_text)
 
-                # Парсинг результата
-                parsed_response = self.parse_response(data)
-                if parsed_response:
-                    self.stats['yagpt_used'] += 1
-                    self.consecutive_errors = 0  # Сброс счетчика ошибок
+                    # Парсинг результата
+                    parsed_response = self.parse_response(data)
+                    if parsed_response:
+                        self.stats['yagpt_used'] += 1
+                        self.consecutive_errors = 0  # Сброс счетчика ошибок
                     
-                    # Проверка качества ответа
-                    if self.is_low_quality_response(parsed_response['description']):
-                        logger.warning("Low quality response detected")
-                        self.stats['yagpt_errors'] += 1
-                        return None
+                        # Проверка качества ответа
+                        if self.is_low_quality_response(parsed_response['description']):
+                            logger.warning("Low quality response detected")
+                            self.stats['yagpt_errors'] += 1
+                            return None
                         
-                    return parsed_response
+                        self._store_result(cache_key, parsed_response)
+                        return parsed_response
                 
-                logger.warning("Failed to parse YandexGPT response")
-                self._handle_error(500, "Parsing failed", request_data)
-                return None
+                    logger.warning("Failed to parse YandexGPT response")
+                    self._handle_error(500, "Parsing failed", request_data)
+                    return None
 
         except asyncio.TimeoutError:
             logger.error("Yandex GPT request timeout")
@@ -204,26 +313,89 @@ class AsyncYandexGPT:
                 self.active = False
                 self._handle_error(500, "Session closed", {})
             else:
-                logger.error(f"Runtime error in YandexGPT: {str(e)}")
+                logger.error("Runtime error in YandexGPT: %s", e)
                 self._handle_error(500, str(e), {})
             return None
         except aiohttp.ClientConnectionError as e:
-            logger.error(f"Connection error: {str(e)}")
+            logger.error("Connection error: %s", e)
             self._handle_error(503, "Connection error", {})
             return None
         except Exception as e:
-            logger.error(f"Yandex GPT enhancement error: {str(e)}", exc_info=True)
+            logger.error("Yandex GPT enhancement error: %s", e, exc_info=True)
             self._handle_error(500, str(e), {})
             return None
 
+    def _payload_shell(self, model_uri: str, max_tokens: int) -> Dict:
+        """Общая часть тела запроса: modelUri и completionOptions для текущих настроек"""
+        key = (model_uri, self.config.YAGPT_TEMPERATURE, max_tokens)
+        if key != self._payload_key:
+            self._payload_key = key
+            self._payload_template = {
+                "modelUri": model_uri,
+                "completionOptions": {
+                    "stream": False,
+                    "temperature": self.config.YAGPT_TEMPERATURE,
+                    "maxTokens": max_tokens
+                }
+            }
+        return self._payload_template
+
+    def _cache_key(self, title: str, description: str) -> str:
+        """Ключ кеша: текст поста вместе с моделью и промптом, чтобы смена настроек не отдавала старые ответы"""
+        raw = "\x00".join((self.config.YAGPT_MODEL, self.config.YAGPT_PROMPT, str(title), str(description)))
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cached_result(self, key: str) -> Optional[Dict]:
+        """Возвращает копию неустаревшего ответа из кеша или None"""
+        entry = self._result_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at >= self.RESULT_CACHE_TTL:
+            del self._result_cache[key]
+            return None
+        self._result_cache.move_to_end(key)
+        return dict(result)
+
+    def _store_result(self, key: str, result: Dict) -> None:
+        """Сохраняет ответ в кеш, вытесняя самые старые записи сверх лимита"""
+        self._result_cache[key] = (time.monotonic(), dict(result))
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+
+    async def _acquire_token(self) -> None:
+        """Ждет токен перед запросом; пауза ожидания не занимает слот параллельности"""
+        async with self._bucket_lock:
+            now = time.monotonic()
+            self._tokens = min(self.REQUESTS_PER_SECOND, self._tokens + (now - self._tokens_updated) * self._rate)
+            self._tokens_updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+            self._tokens = 0.0
+            self._tokens_updated = time.monotonic()
+
+    def _retry_delay(self, retry_after: Optional[str], attempt: int) -> float:
+        """Пауза перед повтором: Retry-After сервера или экспоненциальный отступ, плюс джиттер"""
+        try:
+            base = float(retry_after) if retry_after else 0.0
+        except ValueError:
+            base = 0.0
+        if base <= 0:
+            base = self.RETRY_BASE_DELAY * (2 ** attempt)
+        return min(base * (1 + random.random() * 0.5), self.RETRY_MAX_DELAY)
+
     def _handle_error(self, status: int, error: str, request_data: dict):
         """Обрабатывает ошибки и обновляет счетчики"""
         self.error_count += 1
         self.consecutive_errors += 1
         self.stats['yagpt_errors'] += 1
         
-        logger.error(f"Yandex GPT API error: {status} - {error[:500]}")
-        logger.debug(f"Request body: {json.dumps(request_data, ensure_ascii=False)[:500]}...")
+        logger.error("Yandex GPT API error: %s - %.500s", status, error)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request body: %.500s...", json.dumps(request_data, ensure_ascii=False))
         
         # Автоотключение при частых ошибках
         if self.consecutive_errors >= self.max_consecutive_errors:
@@ -235,22 +407,10 @@ class AsyncYandexGPT:
         if not text:
             return True
 
-        quality_indicators = [
-            "в интернете есть много сайтов",
-            "посмотрите, что нашлось в поиске",
-            "дополнительные материалы:",
-            "смотрите также:",
-            "читайте далее",
-            "читайте также",
-            "рекомендуем прочитать",
-            "подробнее на сайте",
-            "другие источники:",
-            "больше информации можно найти",
-            r"\[.*\]\(https?://[^\)]+\)"  # Markdown ссылки
-        ]
-
         text_lower = text.lower()
-        return any(re.search(phrase, text_lower) for phrase in quality_indicators)
+        if any(phrase in text_lower for phrase in _LOW_QUALITY_PHRASES):
+            return True
+        return _MD_LINK_RE.search(text) is not None
 
     def parse_response(self, data: Dict) -> Optional[Dict]:
         try:
@@ -259,64 +419,52 @@ class AsyncYandexGPT:
                 return None
 
             text = data['result']['alternatives'][0]['message']['text']
-            logger.debug(f"Response text: {text[:200]}...")
-
-            # Попытка прямого JSON парсинга
-            try:
-                start_idx = text.find('{')
-                end_idx = text.rfind('}')
-                if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                    json_str = text[start_idx:end_idx+1]
-                    result = json.loads(json_str)
-                    if isinstance(result, dict) and 'title' in result and 'description' in result:
-                        return {
-                            'title': self._sanitize_text(result['title'])[:self.config.MAX_TITLE_LENGTH],
-                            'description': self._sanitize_text(result['description'])[:self.config.MAX_DESC_LENGTH]
-                        }
-            except (ValueError, json.JSONDecodeError, AttributeError):
-                pass
-
-            # Расширенные шаблоны для извлечения данных
-            patterns = [
-                r'(?i)title["\']?:\s*["\'](.+?)["\']',
-                r'(?i)заголовок["\']?:\s*["\'](.+?)["\']',
-                r'(?i)(?:title|заголовок)[\s:]*["\']?(.+?)["\']?(?:\n|$|\.)',
-                r'(?i)(?:description|описание)[\s:]*["\']?(.+?)["\']?(?:\n|$|\.)',
-                r'{"title"\s*:\s*"([^"]+)"[^}]*"description"\s*:\s*"([^"]+)"}',
-                r'<title>(.+?)</title>\s*<description>(.+?)</description>',
-                r'(?i)(?:заголовок|title):?\s*([^\n]+)\n+(?:описание|description):?\s*([^\n]+)'
-            ]
+            logger.debug("Response text: %.200s...", text)
+
+            # Попытка прямого JSON парсинга: только если после '{' есть '}'.
+            # В try только декодирование, иначе ошибки ниже молча уводили бы в fallback
+            start_idx = text.find('{')
+            end_idx = text.rfind('}') if start_idx != -1 else -1
+            if end_idx > start_idx:
+                try:
+                    result = _json_loads(text[start_idx:end_idx + 1])
+                except ValueError:  # json.JSONDecodeError и orjson.JSONDecodeError
+                    result = None
+                if isinstance(result, dict) and 'title' in result and 'description' in result:
+                    return {
+                        'title': self._sanitize_text(result['title'])[:self.config.MAX_TITLE_LENGTH],
+                        'description': self._sanitize_text(result['description'])[:self.config.MAX_DESC_LENGTH]
+                    }
 
             title_match = None
             desc_match = None
 
-            # Поиск заголовка
-            for pattern in patterns:
-                match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-                if match and match.lastindex >= 1:
+            # Заголовок и описание ищутся за один проход: каждый шаблон применяется к тексту
+            # один раз, первый подходящий результат для каждого поля сохраняется
+            for pattern in _EXTRACT_PATTERNS:
+                match = pattern.search(text)
+                if not match:
+                    continue
+                groups = match.lastindex or 0
+                if title_match is None and groups >= 1:
                     title_candidate = match.group(1).strip()
                     if len(title_candidate) > 5:
                         title_match = title_candidate
-                        break
-
-            # Поиск описания
-            if title_match:
-                for pattern in patterns:
-                    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-                    if match and match.lastindex >= 2:
-                        desc_candidate = match.group(2).strip()
-                        if len(desc_candidate) > 10:
-                            desc_match = desc_candidate
-                            break
+                if desc_match is None and groups >= 2:
+                    desc_candidate = match.group(2).strip()
+                    if len(desc_candidate) > 10:
+                        desc_match = desc_candidate
+                if title_match is not None and desc_match is not None:
+                    break
 
             # Fallback стратегии
             if not title_match or not desc_match:
-                parts = re.split(r'\n\n|\n-|\n•', text, maxsplit=1)
+                parts = _PARA_SPLIT_RE.split(text, maxsplit=1)
                 if len(parts) >= 2:
                     title_match = parts[0].strip()
                     desc_match = parts[1].strip()
                 else:
-                    sentences = re.split(r'[.!?]\s+', text)
+                    sentences = _SENT_SPLIT_RE.split(text)
                     if len(sentences) > 1:
                         title_match = sentences[0]
                         desc_match = ' '.join(sentences[1:3])[:500]
@@ -329,8 +477,12 @@ class AsyncYandexGPT:
                 'description': self._sanitize_text(desc_match)[:self.config.MAX_DESC_LENGTH]
             }
 
+        except (KeyError, IndexError, TypeError) as e:
+            # Ответ не той структуры: обычная ситуация, трассировка не нужна
+            logger.debug("YandexGPT parse failed: %r", e)
+            return None
         except Exception as e:
-            logger.error(f"YandexGPT parsing error: {str(e)}", exc_info=True)
+            logger.error("YandexGPT parsing error: %s", e, exc_info=True)
             return None
 
     @staticmethod
@@ -338,12 +490,5 @@ class AsyncYandexGPT:
         """Sanitizes text for Telegram HTML parsing"""
         if not text:
             return ""
-        sanitized = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', str(text))
-        return (
-            sanitized
-            .replace('&', '&amp;')
-            .replace('<', '&lt;')
-            .replace('>', '&gt;')
-            .replace('"', '&quot;')
-            .replace("'", "&apos;")
-        )
\ No newline at end of file
+        # html.escape дает &#x27; для апострофа; оставляем прежний &apos;
+        return html.escape(_CTRL_CHARS_RE.sub('', str(text))).replace('&#x27;', '&apos;')
\ No newline at end of file